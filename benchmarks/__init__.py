@@ -0,0 +1,7 @@
+"""XMLLang benchmarks
+
+:py:mod:`benchmarks.corpus` generates scalable XMLLang documents and
+:py:mod:`benchmarks.runner` times every phase of the pipeline on them.
+The remaining modules compare a single component with the
+implementation it replaced.
+"""
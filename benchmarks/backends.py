@@ -0,0 +1,64 @@
+"""Compares the parse trees built by the ``expat`` and ``etree`` backends
+of :py:meth:`Parser.fromfile` on the synthetic corpus: time to a parse
+tree, peak memory and the number of memory blocks the tree keeps alive.
+
+    python -m benchmarks.backends [--scale N] [--repeat N]
+"""
+
+import gc
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.corpus import generate
+from xmllang.parser import Parser
+
+BACKENDS = ("etree", "expat")
+
+
+def parse_tree(path, backend):
+    parser = Parser.fromfile(path, backend=backend)
+    return parser, parser._parse(parser.root)
+
+
+def measure(path, backend, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        parse_tree(path, backend)
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    tree = parse_tree(path, backend)
+    _, peak = tracemalloc.get_traced_memory()
+    statistics = tracemalloc.take_snapshot().statistics("filename")
+    blocks = sum(stat.count for stat in statistics)
+    tracemalloc.stop()
+    del tree
+
+    return best, peak, blocks
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.backends")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for path in generate(directory, args.scale):
+            print(path.stem)
+            for backend in BACKENDS:
+                elapsed, peak, blocks = measure(path, backend, args.repeat)
+                print(
+                    f"  {backend:6} {elapsed:8.4f}s {peak / 2 ** 20:9.2f} MiB "
+                    f"{blocks:10} blocks"
+                )
+
+
+if __name__ == "__main__":
+    main()
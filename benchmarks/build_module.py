@@ -0,0 +1,111 @@
+"""Compares :py:meth:`Parser.build_module` against the level map
+builder it replaced (``deepcopy`` of the whole map, evaluated level
+by level).
+
+    python -m benchmarks.build_module [STATEMENTS]
+"""
+
+import ast
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+from collections import defaultdict, OrderedDict
+from copy import deepcopy
+
+from xmllang.parser import Parser
+from xmllang.parser.parser import AST_CONS_MAP, XMLExpr
+
+STATEMENT = """
+<config>
+    <dict>
+        <item name="name">value</item>
+        <item name="size">15</item>
+        <item name="ratio">1.5</item>
+        <item name="tags">
+            <list>
+                <e>a</e>
+                <e>b</e>
+                <e><tuple><e>1</e><e>2</e></tuple></e>
+            </list>
+        </item>
+    </dict>
+</config>
+<print call="True"><e><config /></e></print>
+"""
+
+
+def make_document(statements):
+    body = STATEMENT * (statements // 2)
+    return ET.ElementTree(ET.fromstring(f"<xmllang>{body}</xmllang>"))
+
+
+def legacy_parse(parser, root, ctx, level=0, bind_to=None):
+    for node in root:
+        expr = XMLExpr(node, parent=bind_to, children=[])
+
+        if bind_to is not None:
+            bind_to.children.append(expr)
+
+        if len(node) == 0:
+            if bind_to:
+                ctx[level - 1][bind_to].append(expr)
+            else:
+                ctx[level][expr] = [expr]
+        else:
+            ctx[level][expr] = []
+            ctx = legacy_parse(parser, node, ctx, level + 1, expr)
+    return ctx
+
+
+def legacy_build(parser):
+    points = legacy_parse(parser, parser.root, defaultdict(dict))
+    points = OrderedDict(reversed(list(points.items())))
+    xmlast = deepcopy(points)
+
+    for level, point in points.items():
+        xmlast[level] = []
+        for encap, exprs in point.items():
+            for expr in exprs:
+                expr.value = parser.xmleval(expr)
+            encap.value = parser.xmleval(encap)
+            xmlast[level].append(encap)
+
+    content = []
+    for expr in xmlast[0]:
+        if isinstance(expr.value, AST_CONS_MAP):
+            content.append(expr.value)
+        else:
+            content.append(ast.Expr(expr.value))
+
+    module = ast.Module(content)
+    ast.fix_missing_locations(module)
+    return module
+
+
+def measure(func, parser):
+    tracemalloc.start()
+    start = time.perf_counter()
+    module = func(parser)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return module, elapsed, peak
+
+
+def main(statements=10000):
+    parser = Parser(make_document(statements))
+
+    legacy, legacy_time, legacy_peak = measure(legacy_build, parser)
+    current, current_time, current_peak = measure(Parser.parse, parser)
+    assert ast.dump(legacy) == ast.dump(current)
+
+    print(f"{statements} statements")
+    print(f"legacy   {legacy_time:8.3f}s {legacy_peak / 2 ** 20:8.1f} MiB")
+    print(f"current  {current_time:8.3f}s {current_peak / 2 ** 20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    import sys
+
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,111 @@
+"""Synthetic XMLLang corpus
+
+Every generator takes a size and returns an executable XMLLang document
+whose element count grows linearly with it.
+
+    python -m benchmarks.corpus DIRECTORY [--scale N]
+"""
+
+import os
+from pathlib import Path
+
+LITERALS = ("15", "15.5", "batuhan", "True", "None", "...", "-3")
+
+
+def document(body):
+    return f'<xmllang version="0.1">\n{body}</xmllang>\n'
+
+
+def assignments(size):
+    """Many top-level assignments"""
+
+    return document(
+        "".join(
+            f"<v{i}>{LITERALS[i % len(LITERALS)]}</v{i}>\n<v{i}></v{i}>\n"
+            for i in range(size)
+        )
+    )
+
+
+def wide_list(size):
+    """A single list with size elements"""
+
+    items = "".join(f"<e>{LITERALS[i % len(LITERALS)]}</e>" for i in range(size))
+    return document(f"<list>{items}</list>\n")
+
+
+def huge_dict(size):
+    """A single dict with size items, some of them nested"""
+
+    items = []
+    for i in range(size):
+        if i % 10 == 0:
+            value = f"<tuple><e>{i}</e><e>key{i}</e></tuple>"
+        else:
+            value = LITERALS[i % len(LITERALS)]
+        items.append(f'<item name="key{i}">{value}</item>')
+
+    return document(f"<dict>{''.join(items)}</dict>\n")
+
+
+def deep_nesting(size, depth=50):
+    """size // depth statements, each a list nested depth levels deep"""
+
+    nested = "<e>1</e>"
+    for _ in range(depth):
+        nested = f"<e><list><e>0</e>{nested}</list></e>"
+
+    return document(f"{nested[3:-4]}\n" * max(size // depth, 1))
+
+
+def call_chains(size, length=20):
+    """size // length statements, each a chain of attribute calls"""
+
+    chain = '<attr name="upper" call="True" /><attr name="lower" call="True" />'
+    chain *= length // 2
+
+    return document(
+        "<text>batuhan</text>\n"
+        + f"<result><text>{chain}</text></result>\n" * max(size // length, 1)
+    )
+
+
+CORPUS = {
+    generator.__name__: generator
+    for generator in (assignments, wide_list, huge_dict, deep_nesting, call_chains)
+}
+
+SIZES = {
+    "assignments": 20000,
+    "wide_list": 100000,
+    "huge_dict": 50000,
+    "deep_nesting": 20000,
+    "call_chains": 20000,
+}
+
+
+def generate(directory, scale=1.0):
+    """Writes every corpus document into directory, returns their paths"""
+
+    directory = Path(os.fspath(directory))
+    directory.mkdir(parents=True, exist_ok=True)
+
+    paths = []
+    for name, generator in CORPUS.items():
+        path = directory / f"{name}.xml"
+        path.write_text(generator(int(SIZES[name] * scale)))
+        paths.append(path)
+
+    return paths
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.corpus")
+    parser.add_argument("directory")
+    parser.add_argument("--scale", type=float, default=1.0)
+    args = parser.parse_args()
+
+    for path in generate(args.directory, args.scale):
+        print(path)
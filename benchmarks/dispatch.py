@@ -0,0 +1,71 @@
+"""Per node cost of semantic dispatch: cached stateless handlers
+(:py:func:`get_handler`) against instantiating the rule of every node
+(``get_decl(tag)(expr).make()``).
+
+    python -m benchmarks.dispatch [STATEMENTS]
+"""
+
+import time
+import xml.etree.ElementTree as ET
+
+from xmllang.parser import Parser
+from xmllang.parser.semantics import get_decl, get_handler
+
+STATEMENT = """
+<config>
+    <dict>
+        <item name="name">value</item>
+        <item name="size">15</item>
+        <item name="tags"><list><e>a</e><e>b</e><e>1.5</e></list></item>
+    </dict>
+</config>
+<print call="True"><e>x</e><config><attr name="keys" call="True" /></config></print>
+"""
+
+
+def instantiate(expr):
+    return get_decl(expr.expr.tag)(expr).make()
+
+
+def cached(expr):
+    return get_handler(expr.expr.tag)(expr)
+
+
+def postorder(exprs):
+    nodes = []
+    stack = [(expr, False) for expr in reversed(exprs)]
+    while stack:
+        expr, visited = stack.pop()
+        if visited:
+            nodes.append(expr)
+        else:
+            stack.append((expr, True))
+            stack.extend((child, False) for child in reversed(expr.children))
+    return nodes
+
+
+def measure(dispatch, nodes, rounds=5):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for expr in nodes:
+            expr.value = dispatch(expr)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(statements=20000):
+    body = STATEMENT * (statements // 2)
+    parser = Parser(ET.ElementTree(ET.fromstring(f"<xmllang>{body}</xmllang>")))
+    nodes = postorder(parser._parse(parser.root))
+
+    print(f"{len(nodes)} nodes")
+    for name, dispatch in (("instantiate", instantiate), ("cached", cached)):
+        elapsed = measure(dispatch, nodes)
+        print(f"{name:12} {elapsed:6.3f}s {elapsed / len(nodes) * 1e9:8.0f} ns/node")
+
+
+if __name__ == "__main__":
+    import sys
+
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,156 @@
+"""Times every phase of the XMLLang pipeline on the synthetic corpus
+
+Phases are ``ET.parse``, ``Parser._parse``, ``build_module``,
+``compile`` and ``exec``. Each phase is timed (best of ``--repeat``
+runs) and then run once more under :py:mod:`tracemalloc` to record its
+peak memory. Results are written as JSON so two revisions can be
+compared:
+
+    python -m benchmarks.runner --output before.json
+    python -m benchmarks.runner --output after.json
+    python -m benchmarks.runner --compare before.json after.json
+"""
+
+import gc
+import json
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from benchmarks.corpus import generate
+from xmllang.parser import Parser
+
+PHASES = ("ET.parse", "Parser._parse", "build_module", "compile", "exec")
+
+
+def run_phases(path):
+    """Returns (phase, callable) pairs of one pipeline run. Calling them
+    in order runs the pipeline, so each phase can be measured alone."""
+
+    state = {}
+
+    def et_parse():
+        state["xml"] = ET.parse(path)
+
+    def parse():
+        state["parser"] = Parser(state["xml"])
+        state["exprs"] = state["parser"]._parse(state["parser"].root)
+
+    def build_module():
+        state["module"] = state["parser"].build_module(state["exprs"])
+
+    def compile_module():
+        state["code"] = compile(state["module"], str(path), "exec")
+
+    def execute():
+        exec(state["code"], {})
+
+    return zip(PHASES, (et_parse, parse, build_module, compile_module, execute))
+
+
+def measure(path, repeat=3):
+    times = dict.fromkeys(PHASES, float("inf"))
+    for _ in range(repeat):
+        for phase, func in run_phases(path):
+            gc.collect()
+            start = time.perf_counter()
+            func()
+            times[phase] = min(times[phase], time.perf_counter() - start)
+
+    peaks = {}
+    for phase, func in run_phases(path):
+        gc.collect()
+        tracemalloc.start()
+        func()
+        peaks[phase] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {phase: {"time": times[phase], "peak": peaks[phase]} for phase in PHASES}
+
+
+def revision():
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=Path(__file__).parent,
+            universal_newlines=True,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(scale=1.0, repeat=3):
+    with tempfile.TemporaryDirectory() as directory:
+        documents = {
+            path.stem: measure(path, repeat) for path in generate(directory, scale)
+        }
+
+    return {
+        "revision": revision(),
+        "python": platform.python_version(),
+        "scale": scale,
+        "documents": documents,
+    }
+
+
+def format_results(results):
+    lines = [f"revision {results['revision']}, python {results['python']}"]
+    for name, phases in results["documents"].items():
+        lines.append(name)
+        for phase, result in phases.items():
+            lines.append(
+                f"  {phase:14} {result['time']:8.4f}s "
+                f"{result['peak'] / 2 ** 20:9.2f} MiB"
+            )
+    return "\n".join(lines)
+
+
+def compare(before, after):
+    lines = [f"{before['revision']} -> {after['revision']}"]
+    for name, phases in after["documents"].items():
+        if name not in before["documents"]:
+            continue
+
+        lines.append(name)
+        for phase, result in phases.items():
+            base = before["documents"][name].get(phase)
+            if base is None:
+                continue
+
+            lines.append(
+                f"  {phase:14} time x{result['time'] / base['time']:6.2f}  "
+                f"peak x{result['peak'] / max(base['peak'], 1):6.2f}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.runner")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        before, after = (json.loads(Path(path).read_text()) for path in args.compare)
+        print(compare(before, after))
+        return
+
+    results = run(args.scale, args.repeat)
+    print(format_results(results))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
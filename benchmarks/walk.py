@@ -0,0 +1,101 @@
+"""Compares the explicit stack tree walk of :py:meth:`Parser._parse`
+and :py:meth:`Parser._build` against the recursive walk it replaced,
+on ordinarily nested documents. Both walks locate and intern the values
+they build, sharing of literal subtrees is off for both.
+
+    python -m benchmarks.walk [STATEMENTS] [ROUNDS]
+"""
+
+import ast
+import gc
+import time
+import xml.etree.ElementTree as ET
+
+from xmllang.parser import Parser
+from xmllang.parser.optimizer import FOLDERS, fold
+from xmllang.parser.parser import XMLExpr, locate
+
+STATEMENT = """
+<config>
+    <dict>
+        <item name="name">value</item>
+        <item name="size">15</item>
+        <item name="tags">
+            <list>
+                <e>a</e>
+                <e><tuple><e>1</e><e>2</e></tuple></e>
+                <e><set><e>1.5</e><e><list><e>x</e></list></e></set></e>
+            </list>
+        </item>
+    </dict>
+</config>
+<print call="True"><e>x</e><config><attr name="keys" call="True" /></config></print>
+"""
+
+
+class RecursiveParser(Parser):
+    def _build(self, expr, state):
+        for child in expr.children:
+            self._build(child, state)
+
+        value = self.xmleval(expr)
+        if self.optimize and type(value) in FOLDERS:
+            value = fold(value)
+
+        locate(value, expr.lineno, expr.col_offset, self.strings.intern)
+        expr.value = value
+
+    def _parse(self, root, bind_to=None):
+        exprs = []
+        for node in root:
+            expr = XMLExpr(node, parent=bind_to)
+            exprs.append(expr)
+
+            if len(node) != 0:
+                expr.children = self._parse(node, expr)
+
+        return exprs
+
+
+def measure(cls, xml):
+    gc.collect()
+    gc.disable()
+    try:
+        parser = cls(xml, share=frozenset())
+
+        start = time.perf_counter()
+        exprs = parser._parse(parser.root)
+        parse = time.perf_counter() - start
+
+        start = time.perf_counter()
+        module = parser.build_module(exprs)
+        build = time.perf_counter() - start
+    finally:
+        gc.enable()
+
+    return ast.dump(module, include_attributes=True), parse, build
+
+
+def main(statements=20000, rounds=5):
+    body = STATEMENT * (statements // 2)
+    xml = ET.ElementTree(ET.fromstring(f"<xmllang>{body}</xmllang>"))
+
+    timings = {RecursiveParser: [], Parser: []}
+    dumps = set()
+    for _ in range(rounds):
+        for cls, times in timings.items():
+            dump, *elapsed = measure(cls, xml)
+            dumps.add(dump)
+            times.append(elapsed)
+    assert len(dumps) == 1
+
+    print(f"{statements} statements {'_parse':>10} {'build':>9}")
+    for name, cls in (("recursive", RecursiveParser), ("iterative", Parser)):
+        parse, build = map(min, zip(*timings[cls]))
+        print(f"{name:20} {parse:9.3f}s {build:8.3f}s")
+
+
+if __name__ == "__main__":
+    import sys
+
+    main(*map(int, sys.argv[1:]))
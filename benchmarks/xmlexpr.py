@@ -0,0 +1,85 @@
+"""Measures memory per :py:class:`XMLExpr` node and parse/build time
+against the previous ``@dataclass(unsafe_hash=True)`` node.
+
+    python -m benchmarks.xmlexpr [ELEMENTS]
+"""
+
+from __future__ import annotations
+
+import ast
+import gc
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence
+from unittest import mock
+
+from xmllang.parser import Parser
+from xmllang.parser import parser as parser_module
+
+
+@dataclass(unsafe_hash=True)
+class LegacyXMLExpr:
+    expr: ET.Element
+    value: Optional[ast.AST] = None
+
+    parent: Optional[LegacyXMLExpr] = None
+    children: Optional[Sequence[LegacyXMLExpr]] = field(
+        default_factory=list, hash=False
+    )
+
+    meta: Optional[Dict] = field(default_factory=dict, hash=False)
+
+    # positions of the nodes built from an ET.Element
+    lineno = 1
+    col_offset = 0
+
+    def get_meta(self, key, default=None):
+        return self.meta.get(key, default)
+
+
+def make_document(elements):
+    width = 1000
+    item = "".join(f"<e>{i}</e>" for i in range(width - 2))
+    body = f"<a><list>{item}</list></a>" * max(1, elements // width)
+    return ET.ElementTree(ET.fromstring(f"<xmllang>{body}</xmllang>"))
+
+
+def measure(node_type, xml):
+    with mock.patch.object(parser_module, "XMLExpr", node_type):
+        parser = Parser(xml)
+
+        gc.collect()
+        tracemalloc.start()
+        exprs = parser._parse(parser.root)
+        nodes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del exprs
+
+        gc.collect()
+        start = time.perf_counter()
+        parser.parse()
+        elapsed = time.perf_counter() - start
+
+    return nodes, elapsed
+
+
+def main(elements=1000000):
+    xml = make_document(elements)
+    count = sum(1 for _ in xml.iter()) - 1
+
+    print(f"{count} elements")
+    for name, node_type in (
+        ("dataclass", LegacyXMLExpr),
+        ("slots", parser_module.XMLExpr),
+    ):
+        nodes, elapsed = measure(node_type, xml)
+        print(f"{name:10} {nodes / count:6.1f} B/node  parse+build {elapsed:6.2f}s")
+
+
+if __name__ == "__main__":
+    import sys
+
+    main(*map(int, sys.argv[1:]))
@@ -5,6 +5,6 @@ setup(
     version="0.1",
     author="BTaskaya",
     author_email="batuhanosmantaskaya@gmail.com",
-    packages=find_packages(),
+    packages=find_packages(exclude=("benchmarks", "benchmarks.*")),
     url="https://git.kernel.live/btaskaya/xmllang",
 )
@@ -0,0 +1,135 @@
+import asyncio
+import marshal
+import sys
+import tempfile
+import threading
+import unittest
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+from xmllang.compiler import AsyncCompiler, Compiler
+from xmllang.compiler import aio
+from xmllang.compiler.compiler import cache_from_source
+
+SOURCE = '<xmllang version="0.1"><age>15</age><age></age></xmllang>'
+
+
+class TestAsyncCompiler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        self.path = Path(self.tmp.name)
+        self.sources = []
+        for index in range(20):
+            source = self.path / f"module{index}.xml"
+            source.write_text(SOURCE)
+            self.sources.append(source)
+
+        self.broken = self.path / "broken.xml"
+        self.broken.write_text("<xmllang><age>")
+
+        patcher = mock.patch.object(sys, "dont_write_bytecode", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def collect(self, compiler, paths, concurrency=4):
+        async def collect():
+            return [r async for r in compiler.compile_many(paths, concurrency)]
+
+        return asyncio.run(collect())
+
+    def test_compile(self):
+        source = self.sources[0]
+        asyncio.run(AsyncCompiler().compile(source))
+
+        self.assertEqual(
+            marshal.loads(source.with_suffix(".xmlc").read_bytes()[16:]),
+            Compiler()._compile(source.read_bytes(), path=source),
+        )
+
+    def test_load(self):
+        source = self.sources[0]
+        code = asyncio.run(AsyncCompiler().load(source))
+
+        self.assertEqual(code, Compiler()._compile(source.read_bytes(), path=source))
+        self.assertTrue(Compiler().is_cached(source))
+        self.assertTrue(cache_from_source(source).exists())
+
+    def test_compile_many(self):
+        results = self.collect(AsyncCompiler(), self.sources + [self.broken])
+        statuses = {result.path.name: result.status for result in results}
+
+        self.assertEqual(len(results), 21)
+        self.assertEqual(statuses.pop("broken.xml"), "failed")
+        self.assertEqual(set(statuses.values()), {"compiled"})
+
+    def test_process_pool(self):
+        with ProcessPoolExecutor(2) as executor:
+            results = self.collect(AsyncCompiler(executor), self.sources[:4])
+
+        self.assertEqual({result.status for result in results}, {"compiled"})
+
+    def test_concurrency(self):
+        lock = threading.Lock()
+        running = peak = 0
+        build_pyc = aio.build_pyc
+
+        def counting_build(*args):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            try:
+                return build_pyc(*args)
+            finally:
+                with lock:
+                    running -= 1
+
+        with ThreadPoolExecutor(16) as executor, mock.patch.object(
+            aio, "build_pyc", counting_build
+        ):
+            self.collect(AsyncCompiler(executor), self.sources, concurrency=3)
+
+        self.assertLessEqual(peak, 3)
+
+    def test_cancellation(self):
+        compiler = AsyncCompiler()
+
+        async def first():
+            async for result in compiler.compile_many(self.sources, 2):
+                return result
+
+        with mock.patch.object(aio, "build_pyc", wraps=aio.build_pyc) as build:
+            asyncio.run(first())
+
+        self.assertLessEqual(build.call_count, 4)
+        self.assertLess(
+            sum(source.with_suffix(".xmlc").exists() for source in self.sources), 20
+        )
+
+    def test_event_loop_not_blocked(self):
+        source = self.path / "large.xml"
+        body = "".join(f"<v{i}>{i}</v{i}>" for i in range(20000))
+        source.write_text(f"<xmllang>{body}</xmllang>")
+
+        async def run():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.001)
+                    ticks += 1
+
+            task = asyncio.ensure_future(ticker())
+            await AsyncCompiler().compile(source)
+            task.cancel()
+            return ticks
+
+        self.assertGreater(asyncio.run(run()), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import traceback
+import unittest
+import xml.etree.ElementTree as ET
+
+from xmllang.compiler import Compiler
+
+SOURCE = """<xmllang>
+<name>{0}</name>
+<dict><item name="hosts"><tuple><e>a</e><e>b</e></tuple></item></dict>
+</xmllang>"""
+
+
+def run(code):
+    namespace = {}
+    exec(code, namespace)
+    return namespace
+
+
+class TestCompileMany(unittest.TestCase):
+    def test_compile_many(self):
+        sources = [SOURCE.format(index) for index in range(10)]
+        sources[1] = sources[1].encode()
+        sources[2] = memoryview(sources[2].encode())
+
+        results = Compiler().compile_many(sources)
+
+        self.assertEqual(len(results), 10)
+        for index, code in enumerate(results):
+            self.assertEqual(run(code)["name"], index)
+
+    def test_errors(self):
+        sources = [
+            SOURCE.format(1),
+            "<xmllang><name>",
+            "<xmllang><item>1</item></xmllang>",
+            SOURCE.format(2),
+        ]
+
+        first, malformed, invalid, last = Compiler().compile_many(sources, "doc.xml")
+
+        self.assertIsInstance(malformed, ET.ParseError)
+        self.assertIsInstance(invalid, KeyError)
+        self.assertEqual(run(last)["name"], 2)
+        self.assertEqual(first.co_filename, "doc.xml")
+
+    def test_positions_per_document(self):
+        pair = "<tuple><e>a</e><e>b</e></tuple>"
+        sources = [
+            "<xmllang>" + "\n" * 40 + f"<list><e>{pair}</e></list></xmllang>",
+            f'<xmllang>\n<int call="True"><e>{pair}</e></int></xmllang>',
+        ]
+
+        _, code = Compiler().compile_many(sources)
+        try:
+            run(code)
+        except TypeError as exc:
+            frame = traceback.extract_tb(exc.__traceback__)[-1]
+        else:
+            self.fail("TypeError not raised")
+
+        self.assertEqual(frame.lineno, 2)
+
+    def test_wrapped_copy(self):
+        source = """<xmllang>
+<f call="True"><tuple><e>1</e></tuple></f>
+<g call="True"><e>2</e></g>
+<f call="True"><e><tuple><e>1</e></tuple></e></f>
+</xmllang>"""
+
+        def f(value):
+            raise ValueError(value)
+
+        (code,) = Compiler().compile_many([source])
+        try:
+            exec(code, {"f": f, "g": print})
+        except ValueError as exc:
+            frame = traceback.extract_tb(exc.__traceback__)[-2]
+        else:
+            self.fail("ValueError not raised")
+
+        self.assertEqual(frame.lineno, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
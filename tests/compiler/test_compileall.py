@@ -0,0 +1,54 @@
+import sys
+import tempfile
+import unittest
+
+from pathlib import Path
+from unittest import mock
+from xmllang.compiler.compileall import compile_dir
+from xmllang.compiler.compiler import cache_from_source
+
+SOURCE = '<xmllang version="0.1"><age>15</age><age></age></xmllang>'
+
+
+class TestCompileAll(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        self.path = Path(self.tmp.name)
+        (self.path / "pkg").mkdir()
+        for name in ("a.xml", "b.xml", "pkg/c.xml"):
+            (self.path / name).write_text(SOURCE)
+        (self.path / "pkg" / "broken.xml").write_text("<xmllang><age>")
+
+        patcher = mock.patch.object(sys, "dont_write_bytecode", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def statuses(self, results):
+        return {result.path.name: result.status for result in results}
+
+    def test_compile_dir(self):
+        results = compile_dir(self.path, workers=2)
+
+        self.assertEqual(
+            self.statuses(results),
+            {"a.xml": "compiled", "b.xml": "compiled", "c.xml": "compiled",
+             "broken.xml": "failed"},
+        )
+        self.assertTrue(cache_from_source(self.path / "pkg" / "c.xml").exists())
+
+    def test_skip_up_to_date(self):
+        compile_dir(self.path, workers=1)
+        (self.path / "b.xml").write_text(SOURCE + "\n")
+
+        results = compile_dir(self.path, workers=1)
+        self.assertEqual(
+            self.statuses(results),
+            {"a.xml": "skipped", "b.xml": "compiled", "c.xml": "skipped",
+             "broken.xml": "failed"},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
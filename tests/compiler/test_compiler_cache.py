@@ -0,0 +1,87 @@
+import os
+import sys
+import tempfile
+import unittest
+
+from pathlib import Path
+from py_compile import PycInvalidationMode
+from unittest import mock
+from xmllang.compiler import Compiler
+from xmllang.compiler.compiler import MAGIC_NUMBER, cache_from_source
+
+SOURCE = '<xmllang version="0.1"><age>15</age><age></age></xmllang>'
+CHANGED = '<xmllang version="0.1"><age>16</age><age></age></xmllang>'
+
+
+class CountingCompiler(Compiler):
+    compiled = 0
+
+    def _compile(self, data, *args, **kwargs):
+        self.compiled += 1
+        return super()._compile(data, *args, **kwargs)
+
+
+class TestCompilerCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = Path(self.tmp.name) / "module.xml"
+        self.source.write_text(SOURCE)
+
+        patcher = mock.patch.object(sys, "dont_write_bytecode", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cache_written(self):
+        compiler = CountingCompiler()
+        compiler.load(self.source)
+
+        pyc = cache_from_source(self.source).read_bytes()
+        st = os.stat(self.source)
+        self.assertEqual(pyc[:4], MAGIC_NUMBER)
+        self.assertEqual(pyc[4:8], bytes(4))
+        self.assertEqual(int.from_bytes(pyc[8:12], "little"), int(st.st_mtime))
+        self.assertEqual(int.from_bytes(pyc[12:16], "little"), st.st_size)
+
+    def test_timestamp_cache(self):
+        compiler = CountingCompiler()
+        code = compiler.load(self.source)
+        self.assertEqual(compiler.load(self.source), code)
+        self.assertEqual(compiler.compiled, 1)
+
+        self.source.write_text(CHANGED + " ")
+        compiler.load(self.source)
+        self.assertEqual(compiler.compiled, 2)
+
+    def test_hash_cache(self):
+        compiler = CountingCompiler(PycInvalidationMode.CHECKED_HASH)
+        compiler.load(self.source)
+        compiler.load(self.source)
+        self.assertEqual(compiler.compiled, 1)
+
+        # same size and (possibly) same mtime, only the hash can notice
+        self.source.write_text(CHANGED)
+        namespace = {}
+        exec(compiler.load(self.source), namespace)
+        self.assertEqual(compiler.compiled, 2)
+        self.assertEqual(namespace["age"], 16)
+
+    def test_bad_magic(self):
+        compiler = CountingCompiler()
+        compiler.load(self.source)
+
+        cache = cache_from_source(self.source)
+        cache.write_bytes(b"\0\0\0\0" + cache.read_bytes()[4:])
+        compiler.load(self.source)
+        self.assertEqual(compiler.compiled, 2)
+
+    def test_dont_write_bytecode(self):
+        with mock.patch.object(sys, "dont_write_bytecode", True):
+            Compiler().load(self.source)
+        self.assertFalse(cache_from_source(self.source).exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
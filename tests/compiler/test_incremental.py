@@ -0,0 +1,132 @@
+import ast
+import sys
+import tempfile
+import unittest
+
+from pathlib import Path
+from unittest import mock
+from xmllang.compiler import Compiler
+from xmllang.compiler.incremental import IncrementalBuilder, StatementCache, scan
+from xmllang.parser import Parser
+
+STATEMENT = '<a{0}><list><e>{0}</e><e>x</e></list></a{0}>\n'
+PAIR = "<tuple><e>1</e><e>x</e></tuple>"
+REPEATED = f"<list><e>{PAIR}</e><e>{PAIR}</e></list>\n"
+
+
+def make_document(values):
+    body = "".join(STATEMENT.format(value) for value in values)
+    return f'<xmllang version="0.1">\n{body}</xmllang>'.encode()
+
+
+class TestIncremental(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache = Path(self.tmp.name) / "__pycache__" / "module.xmli"
+
+        patcher = mock.patch.object(sys, "dont_write_bytecode", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def build(self, data):
+        builder = IncrementalBuilder(StatementCache(self.cache))
+        module = builder.build(data)
+
+        expected = Parser.frombuffer(data, backend="expat").parse()
+        self.assertEqual(
+            ast.dump(module, include_attributes=True),
+            ast.dump(expected, include_attributes=True),
+        )
+
+        return builder
+
+    def test_scan(self):
+        data = make_document([1, 2])
+        spans = scan(data)
+
+        self.assertEqual(len(spans), 2)
+        self.assertTrue(data[spans[0][0] : spans[0][1]].startswith(b"<a1>"))
+        self.assertTrue(data[spans[1][0] : spans[1][1]].startswith(b"<a2>"))
+        self.assertEqual([span[2:] for span in spans], [(2, 0), (3, 0)])
+
+    def test_rebuild_changed(self):
+        builder = self.build(make_document(range(10)))
+        self.assertEqual((builder.reused, builder.rebuilt), (0, 10))
+        self.assertTrue(self.cache.exists())
+
+        builder = self.build(make_document([0, 1, 2, 99, 4, 5, 6, 7, 8, 9]))
+        self.assertEqual((builder.reused, builder.rebuilt), (9, 1))
+
+        builder = self.build(make_document([0, 1, 2, 99, 4, 5, 6, 7, 8, 9]))
+        self.assertEqual((builder.reused, builder.rebuilt), (10, 0))
+
+    def test_moved_statements(self):
+        self.build(make_document(range(10)))
+
+        data = make_document(range(10)).replace(b"<a3>", b"\n\n  <a3>")
+        builder = self.build(data)
+        self.assertEqual((builder.reused, builder.rebuilt), (9, 1))
+
+        data = make_document([-1, *range(10)]).replace(b"<a3>", b"\n\n  <a3>")
+        builder = self.build(data)
+        self.assertEqual((builder.reused, builder.rebuilt), (10, 1))
+
+    def test_repeated_statement(self):
+        builder = self.build(make_document([1, 2, 1]))
+        self.assertEqual((builder.reused, builder.rebuilt), (0, 3))
+
+        builder = self.build(make_document([1, 2, 1]))
+        self.assertEqual((builder.reused, builder.rebuilt), (3, 0))
+
+        builder = self.build(make_document([1, 1, 2, 1]))
+        self.assertEqual((builder.reused, builder.rebuilt), (3, 1))
+
+    def test_repeated_literal(self):
+        data = make_document([1]).replace(b"<a1>", REPEATED.encode() + b"<a1>")
+        self.build(data)
+
+        builder = self.build(data.replace(b"\n", b"\n\n\n\n\n", 1))
+        self.assertEqual((builder.reused, builder.rebuilt), (2, 0))
+
+    def test_literal_of_other_statements(self):
+        body = "".join(f"<list><e>{i}</e><e>{PAIR}</e></list>\n" for i in range(3))
+        data = f"<xmllang>\n{body}</xmllang>".encode()
+        IncrementalBuilder(StatementCache(self.cache)).build(data)
+
+        data = data.replace(b"<list><e>0", b"\n\n  <list><e>0")
+        data = data.replace(b"<list><e>1", b"<list><e>9")
+        module = IncrementalBuilder(StatementCache(self.cache)).build(data)
+        fresh = self.cache.with_name("fresh.xmli")
+        expected = IncrementalBuilder(StatementCache(fresh)).build(data)
+
+        self.assertEqual(
+            ast.dump(module, include_attributes=True),
+            ast.dump(expected, include_attributes=True),
+        )
+        literals = [stmt.value.elts[1] for stmt in module.body]
+        self.assertEqual([literal.lineno for literal in literals], [4, 5, 6])
+
+    def test_compiler_cache(self):
+        source = Path(self.tmp.name) / "module.xml"
+        source.write_bytes(make_document([1, 2, 1]))
+        compiler = Compiler(incremental=True)
+
+        load = StatementCache._load
+        with mock.patch.object(
+            StatementCache, "_load", autospec=True, side_effect=load
+        ) as loaded:
+            for _ in range(3):
+                compiler._compile(source.read_bytes(), path=source)
+
+        loaded.assert_called_once()
+        self.assertEqual(list(compiler.statements), [source])
+
+    def test_non_utf8(self):
+        data = b"<?xml version='1.0' encoding='latin-1'?>" + make_document([1])
+        self.assertIsNone(scan(data))
+        self.build(data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import ast
+import tempfile
+import unittest
+
+from pathlib import Path
+from unittest import mock
+from xmllang.compiler import Compiler
+from xmllang.compiler import parallel
+from xmllang.compiler.incremental import scan
+from xmllang.compiler.parallel import build_parallel, split
+from xmllang.parser import Parser
+
+STATEMENT = """
+    <config{0}>
+        <dict>
+            <item name="id"><e>{0}</e></item>
+            <item name="pair"><tuple><e>a</e><e>{0}</e></tuple></item>
+        </dict>
+    </config{0}><list><e>{0}</e><e>x</e></list>
+    <print call="True"><e>{0}</e></print>"""
+REPEATED = """
+    <list><tuple><e>1</e><e>x</e></tuple><e>{0}</e></list>
+    <list><e><tuple><e>1</e><e>x</e></tuple></e><e>{0}</e></list>"""
+
+
+def make_document(count=40, declaration="", statement=STATEMENT):
+    body = "".join(statement.format(index) for index in range(count))
+    return f"{declaration}<xmllang>{body}\n</xmllang>\n".encode()
+
+
+def dump(module):
+    return ast.dump(module, include_attributes=True)
+
+
+class TestParallel(unittest.TestCase):
+    def setUp(self):
+        self.data = make_document()
+        self.expected = dump(Parser.frombuffer(self.data, backend="expat").parse())
+
+    def test_split(self):
+        spans = scan(self.data)
+        for count in (1, 2, 7, len(spans)):
+            with self.subTest(count=count):
+                shards = split(spans, count)
+                self.assertLessEqual(len(shards), count)
+                self.assertEqual(shards[0][::2], spans[0][::2])
+                self.assertEqual(shards[0][3], spans[0][3])
+                self.assertEqual(shards[-1][1], spans[-1][1])
+                for previous, shard in zip(shards, shards[1:]):
+                    self.assertEqual(previous[1], shard[0])
+
+    def test_same_module(self):
+        module = build_parallel(self.data, workers=3, min_size=0)
+        self.assertEqual(dump(module), self.expected)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "module.xml"
+            path.write_bytes(self.data)
+            module = build_parallel(self.data, path, workers=2, min_size=0)
+
+        self.assertEqual(dump(module), self.expected)
+
+    def test_repeated_literal(self):
+        data = make_document(statement=REPEATED + STATEMENT)
+        module = build_parallel(data, workers=3, min_size=0)
+        expected = Parser.frombuffer(data, backend="expat").parse()
+
+        self.assertEqual(dump(module), dump(expected))
+        for stmt in (module.body[-5], module.body[-4]):
+            self.assertEqual(stmt.value.elts[0].lineno, 2)
+
+    def test_serial_fallback(self):
+        data = make_document(declaration='<?xml version="1.0" encoding="latin-1"?>')
+        with mock.patch.object(parallel, "ProcessPoolExecutor") as executor:
+            build_parallel(self.data, workers=2)
+            module = build_parallel(data, workers=2, min_size=0)
+
+        executor.assert_not_called()
+        expected = Parser.frombuffer(data, backend="expat").parse()
+        self.assertEqual(dump(module), dump(expected))
+
+    def test_compiler(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "module.xml"
+            path.write_bytes(self.data)
+
+            with mock.patch.object(parallel, "MIN_SIZE", 0), mock.patch.object(
+                parallel, "ProcessPoolExecutor", wraps=parallel.ProcessPoolExecutor
+            ) as executor:
+                code = Compiler(workers=2)._compile(self.data, path=path)
+
+            executor.assert_called_once_with(2)
+            self.assertEqual(code, Compiler()._compile(self.data, path=path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import tempfile
+import unittest
+
+from pathlib import Path
+from xmllang.compiler import Compiler
+
+SOURCE = """<xmllang>
+    <dict>
+        <item name="a"><e>1</e></item>
+    </dict>
+    <result><base /></result>
+</xmllang>
+"""
+
+
+def document(value):
+    return SOURCE.replace("<e>1</e>", f"<e>{value}</e>").encode()
+
+
+class TestRun(unittest.TestCase):
+    def test_namespace(self):
+        compiler = Compiler()
+        inputs = {"base": 10}
+        namespace = compiler.run(document(1), inputs)
+
+        self.assertEqual(namespace["result"], 10)
+        self.assertEqual(inputs, {"base": 10})
+
+        other = compiler.run(document(1), {"base": 20})
+        self.assertEqual(other["result"], 20)
+        self.assertEqual(namespace["result"], 10)
+
+    def test_cache_hits(self):
+        compiler = Compiler()
+        for _ in range(3):
+            compiler.run(document(1), {"base": 1})
+        compiler.run(document(2), {"base": 1})
+
+        self.assertEqual(
+            compiler.code_cache.stats(),
+            {"hits": 2, "misses": 2, "evictions": 0, "size": 2, "maxsize": 256},
+        )
+
+    def test_eviction(self):
+        compiler = Compiler(cache_size=2)
+        for value in (1, 2, 1, 3):
+            compiler.run(document(value), {"base": 1})
+
+        compiler.run(document(1), {"base": 1})
+        stats = compiler.code_cache.stats()
+        self.assertEqual((stats["hits"], stats["evictions"], stats["size"]), (2, 1, 2))
+
+        compiler.run(document(2), {"base": 1})
+        self.assertEqual(compiler.code_cache.misses, 4)
+
+    def test_disabled(self):
+        compiler = Compiler(cache_size=0)
+        compiler.run(document(1), {"base": 1})
+        compiler.run(document(1), {"base": 1})
+
+        self.assertEqual((compiler.code_cache.misses, len(compiler.code_cache)), (2, 0))
+
+    def test_backend(self):
+        compiler = Compiler(backend="etree")
+        self.assertEqual(compiler.run(document(1), {"base": 4})["result"], 4)
+
+        code = compiler._compile(document(1))
+        self.assertEqual(code.co_firstlineno, 1)
+        self.assertEqual(Compiler()._compile(document(1)).co_firstlineno, 3)
+
+        with self.assertRaises(ValueError):
+            Compiler(backend="lxml")
+
+    def test_path(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp) / "module.xml"
+            source.write_bytes(document(1))
+
+            compiler = Compiler()
+            self.assertEqual(compiler.run(source, {"base": 3})["result"], 3)
+            compiler.run(source, {"base": 3})
+            compiler.run(document(1), {"base": 3})
+
+            cache = compiler.code_cache
+            self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_text(self):
+        compiler = Compiler()
+        namespace = compiler.run(document(1).decode(), {"base": 5})
+        compiler.run(document(1), {"base": 5})
+
+        self.assertEqual(namespace["result"], 5)
+        self.assertEqual(compiler.code_cache.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+import io
+import json
+import marshal
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+from xmllang.compiler import Compiler
+from xmllang.compiler.__main__ import main
+from xmllang.compiler.client import ServerError, request, unpack_code
+from xmllang.compiler.server import CompileServer
+
+SOURCE = '<xmllang version="0.1"><age>15</age><age></age></xmllang>'
+CHANGED = '<xmllang version="0.1"><age>16</age><age></age></xmllang>'
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        self.path = Path(self.tmp.name)
+        self.source = self.path / "module.xml"
+        self.source.write_text(SOURCE)
+
+        patcher = mock.patch.object(sys, "dont_write_bytecode", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.socket = self.path / "run" / "compiler.sock"
+        self.server = CompileServer(self.socket)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.start()
+
+        def stop():
+            self.server.shutdown()
+            thread.join()
+            self.server.server_close()
+
+        self.addCleanup(stop)
+
+    def request(self, action, **fields):
+        return request(action, self.socket, **fields)
+
+    def stats(self):
+        return json.loads(self.request("stats"))
+
+    def test_compile(self):
+        to = self.path / "module.xmlc"
+        self.request("compile", file=str(self.source), to=str(to))
+
+        compiler = Compiler()
+        self.assertEqual(
+            marshal.loads(to.read_bytes()[16:]),
+            compiler._compile(self.source.read_bytes(), path=self.source),
+        )
+        self.assertEqual(self.stats(), {"hits": 0, "misses": 1})
+
+    def test_warm_cache(self):
+        for _ in range(3):
+            code = unpack_code(self.request("load", file=str(self.source)))
+        self.assertEqual(self.stats(), {"hits": 2, "misses": 1})
+
+        namespace = {}
+        exec(code, namespace)
+        self.assertEqual(namespace["age"], 15)
+
+        self.source.write_text(CHANGED)
+        os.utime(self.source, ns=(0, 0))
+
+        namespace = {}
+        exec(unpack_code(self.request("load", file=str(self.source))), namespace)
+        self.assertEqual(namespace["age"], 16)
+        self.assertEqual(self.stats(), {"hits": 2, "misses": 2})
+
+    def test_bounded_cache(self):
+        self.server.bytecode.maxsize = 2
+        sources = [self.path / f"module{index}.xml" for index in range(3)]
+        for source in sources:
+            source.write_text(SOURCE)
+            self.request("load", file=str(source))
+        self.request("load", file=str(sources[0]))
+
+        self.assertEqual(len(self.server.bytecode), 2)
+        self.assertEqual(self.server.bytecode.evictions, 2)
+        self.assertEqual(self.stats(), {"hits": 0, "misses": 4})
+
+    def test_incremental(self):
+        self.request("load", file=str(self.source), incremental=True)
+        self.assertIn(self.source.resolve(), self.server.compilers[True].statements)
+
+    def test_errors(self):
+        broken = self.path / "broken.xml"
+        broken.write_text("<xmllang><age>")
+
+        with self.assertRaisesRegex(ServerError, "ParseError"):
+            self.request("load", file=str(broken))
+        with self.assertRaisesRegex(ServerError, "Unknown action"):
+            self.request("link")
+
+    def test_many_clients(self):
+        with ThreadPoolExecutor(16) as executor:
+            payloads = set(
+                executor.map(
+                    lambda _: self.request("load", file=str(self.source)), range(64)
+                )
+            )
+
+        self.assertEqual(len(payloads), 1)
+        self.assertEqual(sum(self.stats().values()), 64)
+
+    def test_foreign_directory(self):
+        run = self.socket.parent
+        run.chmod(0o755)
+        self.addCleanup(run.chmod, 0o700)
+
+        with self.assertRaises(PermissionError):
+            self.request("stats")
+
+        other = self.path / "other" / "compiler.sock"
+        other.parent.mkdir(mode=0o777)
+        other.parent.chmod(0o777)
+        with self.assertRaises(PermissionError):
+            CompileServer(other)
+
+        link = self.path / "link"
+        link.symlink_to(run, target_is_directory=True)
+        run.chmod(0o700)
+        with self.assertRaises(PermissionError):
+            request("stats", link / "compiler.sock")
+
+    def test_magic_number(self):
+        payload = self.request("load", file=str(self.source))
+        with self.assertRaisesRegex(ServerError, "another interpreter"):
+            unpack_code(b"\0\0\0\0" + payload[4:])
+
+    def test_already_running(self):
+        with self.assertRaises(OSError):
+            CompileServer(self.socket)
+
+    def test_client_command(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            status = main(
+                ["xmllang", "client", "exec", str(self.source), "-s", str(self.socket)]
+            )
+
+        self.assertEqual(status, 0)
+        self.assertEqual(self.stats(), {"hits": 0, "misses": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
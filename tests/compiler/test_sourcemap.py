@@ -0,0 +1,120 @@
+import sys
+import tempfile
+import traceback
+import unittest
+
+from pathlib import Path
+from unittest import mock
+from xmllang.compiler import Compiler
+from xmllang.compiler.compiler import cache_from_source
+from xmllang.compiler.sourcemap import SourceMap, map_path
+from xmllang.parser import Parser
+
+SOURCE = """<xmllang version="0.1">
+    <config>
+        <dict>
+            <item name="a">1</item>
+            <item name="b">2</item>
+        </dict>
+    </config>
+    <config></config>
+    <missing></missing>
+</xmllang>
+"""
+
+
+class TestSourceMap(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.source = Path(self.tmp.name) / "module.xml"
+        self.source.write_text(SOURCE)
+
+        patcher = mock.patch.object(sys, "dont_write_bytecode", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_lookup(self):
+        source_map = SourceMap.build(SOURCE.encode())
+
+        self.assertEqual(source_map.lookup(1), "/xmllang")
+        self.assertEqual(source_map.lookup(3), "/xmllang/config[1]/dict[1]")
+        self.assertEqual(source_map.lookup(5, 12), "/xmllang/config[1]/dict[1]/item[2]")
+        self.assertEqual(source_map.lookup(8), "/xmllang/config[2]")
+        self.assertEqual(source_map.lookup(0), None)
+
+    def test_roundtrip(self):
+        source_map = SourceMap.build(SOURCE.encode())
+        loaded = SourceMap.loads(source_map.dumps())
+
+        self.assertEqual(loaded.tags, source_map.tags)
+        for name in ("lines", "columns", "depths", "tag_ids"):
+            self.assertEqual(
+                list(getattr(loaded, name)), list(getattr(source_map, name))
+            )
+
+    def test_parse_tree(self):
+        parser = Parser.fromstring(SOURCE, backend="expat")
+        from_tree = SourceMap.from_tree(parser.root)
+        source_map = SourceMap.build(SOURCE.encode())
+
+        self.assertEqual(from_tree.dumps(), source_map.dumps())
+
+    def test_compact(self):
+        lines = "".join(
+            f"<config><dict><item name='{i}'>{i}</item></dict></config>\n"
+            for i in range(2000)
+        )
+        data = f"<xmllang>\n{lines}</xmllang>".encode()
+        encoded = SourceMap.build(data).dumps()
+
+        self.assertLess(len(encoded), len(data) // 10)
+        self.assertEqual(
+            SourceMap.loads(encoded).lookup(1500, 8),
+            "/xmllang/config[1499]/dict[1]",
+        )
+
+    def test_traceback(self):
+        Compiler().compile(self.source)
+
+        try:
+            Compiler().execute(self.source)
+        except NameError as exc:
+            frame = traceback.extract_tb(exc.__traceback__)[-1]
+        else:
+            self.fail("NameError not raised")
+
+        self.assertEqual((frame.filename, frame.lineno), (str(self.source), 9))
+        self.assertEqual(frame.line, "<missing></missing>")
+
+        bytecodes = self.source.with_suffix(".xmlc"), cache_from_source(self.source)
+        for bytecode in bytecodes:
+            source_map = SourceMap.load(map_path(bytecode))
+            self.assertEqual(source_map.lookup(frame.lineno), "/xmllang/missing[1]")
+
+    def test_shared_literal_traceback(self):
+        self.source.write_text(
+            """<xmllang>
+<f call="True"><tuple><e>1</e></tuple></f>
+<g call="True"><e>2</e></g>
+<h call="True"><e><tuple><e>1</e></tuple></e></h>
+</xmllang>"""
+        )
+
+        def f(value):
+            raise ValueError(value)
+
+        try:
+            exec(Compiler().load(self.source), {"f": f, "g": print, "h": print})
+        except ValueError as exc:
+            frame = traceback.extract_tb(exc.__traceback__)[-2]
+        else:
+            self.fail("ValueError not raised")
+
+        self.assertEqual(frame.lineno, 2)
+        source_map = SourceMap.load(map_path(cache_from_source(self.source)))
+        self.assertEqual(source_map.lookup(frame.lineno), "/xmllang/f[1]")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import ast
+import io
+import tracemalloc
+import unittest
+import xml.etree.ElementTree as ET
+
+from pathlib import Path
+from xmllang.parser import Parser
+from xmllang.parser import expat
+
+PATH = Path(__file__).parent / "demo"
+
+STATEMENT = """
+<config>
+    <dict>
+        <item name="name">value</item>
+        <item name="tags"><list><e>a</e><e>1.5</e></list></item>
+    </dict>
+</config>
+<print call="True"><e f="True">x <a /> y <b /> z</e></print>
+"""
+
+
+class TestExpat(unittest.TestCase):
+    def test_same_module(self):
+        for demo in sorted(PATH.glob("*/*.xml")):
+            with self.subTest(demo=demo.name):
+                self.assertEqual(
+                    ast.dump(Parser.fromfile(demo, backend="etree").parse()),
+                    ast.dump(Parser.fromfile(demo, backend="expat").parse()),
+                )
+
+    def test_text_and_tail(self):
+        data = b"<xmllang><a>x<b>y</b>z<c/>w</a>tail</xmllang>"
+        element = ET.fromstring(data)[0]
+        node = expat.fromstring(data)[0]
+
+        self.assertIsNone(node.parent)
+        self.assertEqual(len(node), len(element))
+        for left, right in zip([element, *element], [node, *node]):
+            self.assertEqual(
+                (left.tag, left.text, left.tail), (right.tag, right.text, right.tail)
+            )
+            self.assertIs(right.expr, right)
+
+    def test_file_object(self):
+        source = io.BytesIO(f"<xmllang>{STATEMENT * 100}</xmllang>".encode())
+        self.assertEqual(len(Parser(expat.parse(source)).parse().body), 200)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            Parser.fromfile(PATH / "test_parser_types" / "seq.xml", backend="sax")
+
+    def test_parse_error(self):
+        with self.assertRaises(ET.ParseError) as context:
+            expat.fromstring(b"<xmllang><a></b></xmllang>")
+        self.assertEqual(context.exception.position, (1, 14))
+
+    def test_memory(self):
+        data = f"<xmllang>{STATEMENT * 2000}</xmllang>".encode()
+
+        def peak(build):
+            tracemalloc.start()
+            try:
+                parser = build()
+                parser._parse(parser.root)
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        etree = peak(lambda: Parser(ET.ElementTree(ET.fromstring(data))))
+        tree = peak(lambda: Parser(expat.Document(expat.fromstring(data))))
+        self.assertLess(tree, etree * 0.75)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import ast
+import unittest
+import xml.etree.ElementTree as ET
+
+from xmllang.parser import Parser
+from xmllang.parser.expat import fromstring
+from xmllang.parser.literals import (
+    classify,
+    classify_leaves,
+    classify_many,
+    strtobool,
+)
+
+
+class TestLiterals(unittest.TestCase):
+    def test_classify(self):
+        cases = {
+            "15": 15,
+            "-15": -15,
+            "+0": 0,
+            "15.5": 15.5,
+            ".5": 0.5,
+            "-.5": -0.5,
+            "True": True,
+            "False": False,
+            "None": None,
+            "...": ...,
+            "batuhan": "batuhan",
+            "15.": "15.",
+            "+": "+",
+            "1e5": "1e5",
+            "Trueish": "Trueish",
+            "": "",
+        }
+        for text, value in cases.items():
+            with self.subTest(text=text):
+                result = classify(text)
+                self.assertEqual(result, value)
+                self.assertIs(type(result), type(value))
+
+    def test_classify_many(self):
+        texts = ["a" * 8 + "b", "1", "a" * 8 + "b", "1"]
+        values = classify_many(texts)
+
+        self.assertEqual(values, ["aaaaaaaab", 1, "aaaaaaaab", 1])
+        self.assertIs(values[0], values[2])
+
+    def test_classify_leaves(self):
+        source = '<x><e>1</e><e cast="str">2</e><list><e> None </e></list></x>'
+        for parse in (ET.fromstring, fromstring):
+            with self.subTest(parse=parse):
+                leaves = classify_leaves(parse(source))
+                self.assertEqual(list(leaves.values()), [1, None])
+
+    def test_constants(self):
+        root = ET.fromstring(
+            "<x><a>True</a><b>False</b><c>None</c><d>0</d><f>0.0</f></x>"
+        )
+        module = Parser(ET.ElementTree(root)).parse()
+        namespace = {}
+        exec(compile(module, "<ast>", "exec"), namespace)
+
+        for name, value in dict(a=True, b=False, c=None, d=0, f=0.0).items():
+            self.assertIs(type(namespace[name]), type(value))
+            self.assertEqual(namespace[name], value)
+
+    def test_strtobool(self):
+        for value in ("True", "yes", "ON", "1", "t"):
+            self.assertIs(strtobool(value), True)
+        for value in ("False", "no", "off", "0", "F"):
+            self.assertIs(strtobool(value), False)
+        with self.assertRaises(ValueError):
+            strtobool("maybe")
+
+
+if __name__ == "__main__":
+    unittest.main()
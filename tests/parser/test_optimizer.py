@@ -0,0 +1,77 @@
+import ast
+import unittest
+import xml.etree.ElementTree as ET
+
+from unittest import mock
+from xmllang.parser import Parser
+from xmllang.parser import optimizer
+
+LITERALS = ("15", "15.5", "batuhan", "True", "None", "...")
+
+
+def literals(count):
+    return "".join(f"<e>{LITERALS[i % len(LITERALS)]}</e>" for i in range(count))
+
+
+def items(count):
+    return "".join(
+        f'<item name="k{i}">{LITERALS[i % len(LITERALS)]}</item>' for i in range(count)
+    )
+
+
+class TestOptimizer(unittest.TestCase):
+    def run_both(self, body):
+        xml = ET.ElementTree(ET.fromstring(f"<xmllang>{body}</xmllang>"))
+        results = []
+        for optimize in (False, True):
+            module = Parser(xml, optimize=optimize).parse()
+            namespace = {}
+            exec(compile(module, "<ast>", "exec"), namespace)
+            results.append((module, namespace))
+
+        self.assertEqual(results[0][1], results[1][1])
+        return results[1][0]
+
+    def test_tuple(self):
+        xml = ET.ElementTree(
+            ET.fromstring(f"<xmllang><tuple>{literals(10)}</tuple></xmllang>")
+        )
+        plain = Parser(xml, optimize=False).parse()
+        folded = Parser(xml).parse()
+
+        self.assertNotEqual(ast.dump(plain), ast.dump(folded))
+        self.assertEqual(
+            compile(plain, "<ast>", "exec"), compile(folded, "<ast>", "exec")
+        )
+
+    def test_small_containers(self):
+        module = self.run_both(f"<list>{literals(10)}</list>")
+        self.assertEqual(len(module.body[0].value.elts), 10)
+
+    def test_list(self):
+        body = literals(1000) + "<e><x /></e>" + literals(500)
+        module = self.run_both(f"<x>1</x><list>{body}</list>")
+        elts = module.body[1].value.elts
+
+        self.assertEqual(
+            [type(elt) for elt in elts], [ast.Starred, ast.Name, ast.Starred]
+        )
+
+    def test_chunks(self):
+        with mock.patch.object(optimizer, "CHUNK_SIZE", 100):
+            module = self.run_both(f"<set>{literals(1000)}</set>")
+        self.assertEqual(len(module.body[0].value.elts), 10)
+
+        with mock.patch.object(optimizer, "CHUNK_SIZE", 100):
+            module = self.run_both(f"<dict>{items(1000)}</dict>")
+        self.assertEqual(module.body[0].value.keys, [None] * 10)
+
+    def test_dict(self):
+        body = items(300) + '<item name="k5"><x /></item>' + items(10)
+        module = self.run_both(f"<x>1</x><dict>{body}</dict>")
+
+        self.assertEqual(len(module.body[1].value.keys), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
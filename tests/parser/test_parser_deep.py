@@ -0,0 +1,70 @@
+import ast
+import sys
+import unittest
+import xml.etree.ElementTree as ET
+
+from xmllang.parser import Parser
+
+DEPTH = 100_000
+
+
+def nested(tag, depth, leaf):
+    return f"<{tag}>" * depth + leaf + f"</{tag}>" * depth
+
+
+class TestParserDeep(unittest.TestCase):
+    def setUp(self):
+        self.assertLess(sys.getrecursionlimit(), DEPTH)
+
+    def parser(self, body):
+        return Parser(ET.ElementTree(ET.fromstring(f"<xmllang>{body}</xmllang>")))
+
+    def test_deep_elements(self):
+        module = self.parser(nested("e", DEPTH, "15")).parse()
+        namespace = {}
+        exec(compile(module, "<ast>", "exec"), namespace)
+
+        self.assertEqual(ast.dump(module.body[0]), "Expr(value=Num(n=15))")
+
+    def test_deep_parse(self):
+        parser = self.parser(nested("list", DEPTH, "<e>1</e>"))
+        exprs = parser._parse(parser.root)
+
+        depth = 0
+        expr = exprs[0]
+        while expr.children:
+            self.assertIs(expr.children[0].parent, expr)
+            expr = expr.children[0]
+            depth += 1
+
+        self.assertEqual(depth, DEPTH)
+
+    def test_deep_build(self):
+        parser = self.parser(nested("list", DEPTH, "<e>1</e>"))
+        stmt = parser._build_stmt(parser._parse(parser.root)[0])
+
+        depth = 0
+        value = stmt.value
+        while isinstance(value, ast.List):
+            value = value.elts[0]
+            depth += 1
+
+        self.assertEqual(depth, DEPTH)
+        self.assertEqual(value.n, 1)
+
+    def test_deep_names(self):
+        parser = self.parser(nested("a", DEPTH, "<b />"))
+        stmt = parser._build_stmt(parser._parse(parser.root)[0])
+
+        depth = 0
+        while isinstance(stmt, ast.Assign):
+            self.assertEqual(stmt.targets[0].id, "a")
+            stmt = stmt.value
+            depth += 1
+
+        self.assertEqual(depth, DEPTH)
+        self.assertEqual(stmt.id, "b")
+
+
+if __name__ == "__main__":
+    unittest.main()
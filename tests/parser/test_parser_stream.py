@@ -0,0 +1,52 @@
+import ast
+import io
+import unittest
+
+from pathlib import Path
+from xmllang.parser import Parser, expat
+from xmllang.parser.strings import InternTable
+
+PATH = Path(__file__).parent / "demo"
+
+
+class TestParserStream(unittest.TestCase):
+    def test_same_statements(self):
+        for demo in sorted(PATH.glob("*/*.xml")):
+            with self.subTest(demo=demo.name):
+                module = Parser.fromfile(demo, backend="expat").parse()
+                stream = list(Parser.iterparse(demo))
+
+                self.assertEqual(
+                    [ast.dump(stmt, include_attributes=True) for stmt in module.body],
+                    [ast.dump(stmt, include_attributes=True) for stmt in stream],
+                )
+
+    def test_file_object(self):
+        body = "<a>1</a><a></a>" * 1000
+        source = io.BytesIO(f"<xmllang>{body}</xmllang>".encode())
+        stream = Parser.iterparse(source)
+
+        self.assertIsInstance(next(stream), ast.Assign)
+        self.assertIsInstance(next(stream), ast.Expr)
+        self.assertEqual(len(list(stream)), 1998)
+
+    def test_literal_per_statement(self):
+        pair = "<list><tuple><e>1</e><e>x</e></tuple></list>\n"
+        source = io.BytesIO(f"<xmllang>\n{pair * 3}</xmllang>".encode())
+        literals = [stmt.value.elts[0] for stmt in Parser.iterparse(source)]
+
+        self.assertEqual([literal.lineno for literal in literals], [2, 3, 4])
+
+    def test_strings_per_statement(self):
+        body = "".join(f"<a{i}>{i}</a{i}>" for i in range(20000))
+        source = io.BytesIO(f"<xmllang>{body}</xmllang>".encode())
+        strings = InternTable()
+        sizes = [len(strings) for _ in expat.iterparse(source, strings)]
+
+        self.assertEqual(len(sizes), 20000)
+        self.assertLess(max(sizes), 10000)
+        self.assertEqual(len(strings), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import ast
+import unittest
+import xml.etree.ElementTree as ET
+
+from xmllang.parser import Parser
+from xmllang.parser.semantics import Expr, Name, SemanticMap, get_handler
+
+
+class Pass(Expr):
+    def make(self) -> ast.Pass:
+        return ast.Pass()
+
+
+class TestSemanticDispatch(unittest.TestCase):
+    def test_cached_handler(self):
+        self.assertIs(get_handler("e"), get_handler("e"))
+        self.assertIs(get_handler("some_name"), Name.build)
+
+    def test_registered_rule(self):
+        xml = ET.ElementTree(ET.fromstring("<xmllang><skip /></xmllang>"))
+        self.assertIs(get_handler("skip"), Name.build)
+
+        SemanticMap["skip"] = Pass
+        try:
+            module = Parser(xml).parse()
+        finally:
+            del SemanticMap["skip"]
+
+        self.assertIsInstance(module.body[0], ast.Pass)
+        self.assertIs(get_handler("skip"), Name.build)
+
+
+if __name__ == "__main__":
+    unittest.main()
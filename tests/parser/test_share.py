@@ -0,0 +1,93 @@
+import ast
+import unittest
+
+from xmllang.parser import Parser
+from xmllang.parser.expat import Document, fromstring
+from xmllang.parser.semantics import LITERAL_RULES
+
+DEFAULTS = """
+<dict>
+    <item name="hosts"><tuple><e>a</e><e>b</e></tuple></item>
+    <item name="flags"><list><e>x</e><e>1</e></list></item>
+</dict>
+"""
+
+SOURCE = f"""<xmllang>
+{DEFAULTS}
+{DEFAULTS}
+<list><tuple><e>1</e></tuple><tuple><e>1</e></tuple></list>
+<tuple><e>1</e><tuple><x /></tuple></tuple>
+<list><e f="True">a <x /> b</e><e f="True">a <x /> b</e></list>
+</xmllang>
+"""
+
+
+def build(**kwargs):
+    return Parser(Document(fromstring(SOURCE)), **kwargs).parse()
+
+
+def run(module):
+    return [
+        eval(compile(ast.Expression(stmt.value), "<ast>", "eval"), {"x": 1})
+        for stmt in module.body
+    ]
+
+
+def value(module, index):
+    return module.body[index].value
+
+
+class TestShare(unittest.TestCase):
+    def test_same_result(self):
+        expected = run(build(share=frozenset()))
+        for share in (None, LITERAL_RULES):
+            with self.subTest(share=share):
+                module = build() if share is None else build(share=share)
+                self.assertEqual(run(module), expected)
+
+    def test_immutable_by_default(self):
+        module = build()
+        first, second = value(module, 0), value(module, 1)
+
+        self.assertIs(first.values[0], second.values[0])
+        self.assertIsNot(first.values[1], second.values[1])
+
+    def test_mutable_literals(self):
+        module = build(share=LITERAL_RULES)
+        self.assertIs(value(module, 0), value(module, 1))
+
+        first, second = run(module)[:2]
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+
+    def test_copies_in_statement(self):
+        for share in (frozenset(), None):
+            with self.subTest(share=share):
+                module = build() if share is None else build(share=share)
+                first, second = value(module, 2).elts
+                self.assertEqual(ast.dump(first), ast.dump(second))
+                self.assertEqual(first is second, share is None)
+
+    def test_not_shared(self):
+        module = build(share=LITERAL_RULES)
+
+        names = value(module, 3).elts[1]
+        self.assertIsInstance(names.elts[0], ast.Name)
+        first, second = value(module, 4).elts
+        self.assertIsNot(first, second)
+
+    def test_wrapped_copy(self):
+        source = """<xmllang>
+<f call="True"><tuple><e>1</e></tuple></f>
+<g call="True"><e>2</e></g>
+<h call="True"><e><tuple><e>1</e></tuple></e></h>
+</xmllang>"""
+        module = Parser(Document(fromstring(source))).parse()
+        first, second = value(module, 0).args[0], value(module, 2).args[0]
+
+        self.assertIs(first, second)
+        self.assertEqual((first.lineno, first.col_offset), (2, 15))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import ast
+import io
+import mmap
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+from pathlib import Path
+from unittest import mock
+from xmllang.parser import Parser
+from xmllang.parser import expat, source
+
+PATH = Path(__file__).parent / "demo"
+BACKENDS = ("expat", "etree")
+
+
+class Reader:
+    """File object without readinto"""
+
+    def __init__(self, data):
+        self.file = io.BytesIO(data)
+
+    def read(self, size=-1):
+        return self.file.read(size)
+
+
+def dump(parser):
+    return ast.dump(parser.parse(), include_attributes=True)
+
+
+class TestSource(unittest.TestCase):
+    def setUp(self):
+        self.path = PATH / "test_parser_types" / "dict.xml"
+        self.data = self.path.read_bytes()
+        self.expected = {
+            "expat": dump(Parser(expat.Document(expat.fromstring(self.data)))),
+            "etree": dump(Parser(ET.parse(str(self.path)))),
+        }
+
+    def test_fromfile(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend), mock.patch.object(
+                source, "CHUNK_SIZE", 7
+            ):
+                self.assertEqual(
+                    dump(Parser.fromfile(self.path, backend=backend)),
+                    self.expected[backend],
+                )
+
+    def test_frombuffer(self):
+        for backend in BACKENDS:
+            buffers = (
+                self.data,
+                bytearray(self.data),
+                memoryview(self.data),
+                io.BytesIO(self.data),
+                Reader(self.data),
+            )
+            for buffer in buffers:
+                with self.subTest(backend=backend, buffer=type(buffer).__name__):
+                    parser = Parser.frombuffer(buffer, backend=backend)
+                    self.assertEqual(dump(parser), self.expected[backend])
+
+    def test_frombuffer_mmap(self):
+        with open(self.path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                self.assertEqual(
+                    dump(Parser.frombuffer(buffer)), self.expected["etree"]
+                )
+
+    def test_frombuffer_path(self):
+        for path in (self.path, str(self.path)):
+            with self.assertRaises(TypeError):
+                Parser.frombuffer(path)
+
+    def test_fromstring(self):
+        for backend in BACKENDS:
+            for text in (self.data.decode(), self.data):
+                with self.subTest(backend=backend, text=type(text).__name__):
+                    parser = Parser.fromstring(text, backend=backend)
+                    self.assertEqual(dump(parser), self.expected[backend])
+
+    def test_frombytes(self):
+        for backend in BACKENDS:
+            for data in (self.data, bytearray(self.data), memoryview(self.data)):
+                with self.subTest(backend=backend, data=type(data).__name__):
+                    parser = Parser.frombytes(data, backend=backend)
+                    self.assertEqual(dump(parser), self.expected[backend])
+
+        for data in (self.data.decode(), self.path, io.BytesIO(self.data)):
+            with self.assertRaises(TypeError):
+                Parser.frombytes(data)
+
+    def test_slices(self):
+        chunks = list(source.slices(self.data, 100))
+
+        self.assertEqual(len(chunks), -(-len(self.data) // 100))
+        with self.assertRaises(ValueError):
+            chunks[0].tobytes()
+
+    def test_empty_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "empty.xml"
+            path.touch()
+
+            with source.mapped(path) as buffer:
+                self.assertEqual(buffer, b"")
+
+            for backend in BACKENDS:
+                with self.assertRaises(ET.ParseError):
+                    Parser.fromfile(path, backend=backend)
+
+
+if __name__ == "__main__":
+    unittest.main()
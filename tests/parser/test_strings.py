@@ -0,0 +1,64 @@
+import ast
+import unittest
+
+from xmllang.parser import Parser
+from xmllang.parser.strings import InternTable
+from xmllang.profiler import Profiler
+
+STATEMENT = """
+<config{0}>
+    <dict>
+        <item name="identifier">value</item>
+        <item name="tags"><list><e>value</e><e> value </e></list></item>
+    </dict>
+</config{0}>
+<print call="True"><e>value</e><item name="identifier">1</item></print>
+"""
+
+
+def make_document(count):
+    body = "".join(STATEMENT.format(index) for index in range(count))
+    return f"<xmllang>{body}</xmllang>".encode()
+
+
+class TestStrings(unittest.TestCase):
+    def strings(self, module):
+        for node in ast.walk(module):
+            for field in ("s", "id", "arg"):
+                value = getattr(node, field, None)
+                if isinstance(value, str):
+                    yield value
+
+    def test_intern_table(self):
+        table = InternTable()
+        first = table.intern("".join(["na", "me"]))
+
+        self.assertIs(table.intern("".join(["nam", "e"])), first)
+        self.assertEqual((len(table), table.reused), (1, 1))
+
+    def test_shared_strings(self):
+        for backend in ("expat", "etree"):
+            with self.subTest(backend=backend):
+                parser = Parser.frombuffer(make_document(10), backend=backend)
+                strings = {}
+                for string in self.strings(parser.parse()):
+                    self.assertIs(strings.setdefault(string, string), string)
+
+                self.assertGreater(parser.strings.reused, 0)
+
+    def test_parse_tree_strings(self):
+        parser = Parser.frombuffer(make_document(2), backend="expat")
+        first, second = parser.root[0], parser.root[2]
+
+        self.assertIs(first[0][0].get("name"), second[0][0].get("name"))
+        self.assertIs(first[0][0].text, second[0][0].text)
+
+    def test_profiler_report(self):
+        profiler = Profiler()
+        Parser.frombuffer(make_document(10), profiler).parse()
+
+        self.assertIn("interned", profiler.stats().format())
+
+
+if __name__ == "__main__":
+    unittest.main()
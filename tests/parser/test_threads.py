@@ -0,0 +1,91 @@
+import ast
+import sys
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+from xmllang.compiler import Compiler
+from xmllang.parser import Parser
+from xmllang.parser.expat import Document, fromstring
+from xmllang.parser.semantics import LITERAL_RULES
+
+STATEMENT = """
+<dict>
+    <item name="id"><e>{0}</e></item>
+    <item name="pair"><tuple><e>a</e><e>{0}</e></tuple></item>
+    <item name="flags"><list><e>x</e><e>1</e></list></item>
+</dict>
+<list><tuple><e>1</e></tuple><tuple><e>1</e></tuple></list>
+<print call="True"><e f="True">value {0}: <base /> end</e></print>
+<print call="True"><e><tuple><e>1</e></tuple></e></print>
+"""
+
+WORKERS = 8
+ROUNDS = 4
+
+
+def make_document(index, count=20):
+    body = "".join(STATEMENT.format(index + offset) for offset in range(count))
+    return f"<xmllang>{body}</xmllang>"
+
+
+def dump(module):
+    return ast.dump(module, include_attributes=True)
+
+
+class TestThreads(unittest.TestCase):
+    def setUp(self):
+        # switch threads as often as possible, so builds interleave
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+
+        self.documents = [make_document(index) for index in range(WORKERS * 2)]
+
+    def map(self, function, items):
+        with ThreadPoolExecutor(WORKERS) as executor:
+            return list(executor.map(function, items))
+
+    def test_separate_parsers(self):
+        def build(text):
+            return dump(Parser.fromstring(text).parse())
+
+        expected = [build(text) for text in self.documents]
+        for _ in range(ROUNDS):
+            self.assertEqual(self.map(build, self.documents), expected)
+
+    def test_shared_parser(self):
+        text = make_document(0, count=50)
+        for share in (frozenset(), LITERAL_RULES):
+            with self.subTest(share=share):
+                parser = Parser(Document(fromstring(text)), share=share)
+                expected = dump(parser.parse())
+
+                modules = self.map(lambda _: parser.parse(), range(WORKERS * ROUNDS))
+                for module in modules:
+                    self.assertEqual(dump(module), expected)
+
+                nodes = [{id(node) for node in ast.walk(module)} for module in modules]
+                self.assertEqual(len(set().union(*nodes)), sum(map(len, nodes)))
+
+                # the copy in <e> of the last statement keeps its position
+                for module in modules:
+                    self.assertEqual(module.body[1].value.elts[0].lineno, 7)
+
+    def test_compiler_run(self):
+        compiler = Compiler()
+        sources = [text.encode() for text in self.documents[:4]] * WORKERS
+
+        def run(index):
+            return compiler.run(sources[index], {"base": index, "print": repr})
+
+        namespaces = self.map(run, range(len(sources)))
+        for index, namespace in enumerate(namespaces):
+            self.assertEqual(namespace["base"], index)
+
+        cache = compiler.code_cache
+        self.assertEqual(len(cache), 4)
+        self.assertEqual(cache.hits + cache.misses, len(sources))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Cumulative import time budgets in microseconds (best of a few runs with
+# warm bytecode caches), a few times what these imports take today
+BUDGETS = {
+    "xmllang.parser.parser": 60_000,
+    "xmllang.compiler.compiler": 90_000,
+    "xmllang.compiler.client": 40_000,
+}
+
+# Debug only or slow to import modules that must stay off the hot path
+HEAVY = {
+    "copy",
+    "dataclasses",
+    "distutils",
+    "inspect",
+    "pprint",
+    "typing",
+    "xml.etree.ElementTree",
+}
+
+
+def import_times(module):
+    """Returns cumulative import time (us) of every module imported by
+    ``import module`` in a fresh interpreter"""
+
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        stderr=subprocess.PIPE,
+        env=env,
+        universal_newlines=True,
+        check=True,
+    )
+
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+    def test_budget(self):
+        for module, budget in BUDGETS.items():
+            with self.subTest(module=module):
+                best = min(import_times(module)[module] for _ in range(3))
+                self.assertLess(best, budget)
+
+    def test_heavy_modules(self):
+        for module in BUDGETS:
+            with self.subTest(module=module):
+                self.assertFalse(HEAVY & import_times(module).keys())
+
+    def test_client_is_thin(self):
+        imported = import_times("xmllang.compiler.client")
+        self.assertFalse(
+            [module for module in imported if module.startswith("xmllang.parser")]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import importlib
+import importlib.util
+import sys
+import tempfile
+import unittest
+
+from pathlib import Path
+from unittest import mock
+from xmllang import importer
+from xmllang.compiler import Compiler
+from xmllang.compiler.compiler import cache_from_source
+
+MODULE = '<xmllang version="0.1"><age>15</age></xmllang>'
+PACKAGE = '<xmllang version="0.1"><name>Batuhan</name></xmllang>'
+
+
+class TestImporter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        path = Path(self.tmp.name)
+        (path / "xmlmod.xml").write_text(MODULE)
+        (path / "xmlpkg").mkdir()
+        (path / "xmlpkg" / "__init__.xml").write_text(PACKAGE)
+        (path / "xmlpkg" / "sub.xml").write_text(MODULE)
+        self.path = path
+
+        for patcher in (
+            mock.patch.object(sys, "path", [self.tmp.name, *sys.path]),
+            mock.patch.object(sys, "dont_write_bytecode", False),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        importer.install()
+        self.addCleanup(importer.uninstall)
+        self.addCleanup(self.forget)
+
+    def forget(self):
+        for name in ("xmlmod", "xmlpkg", "xmlpkg.sub"):
+            sys.modules.pop(name, None)
+
+    def test_import_module(self):
+        import xmlmod
+
+        self.assertEqual(xmlmod.age, 15)
+        self.assertEqual(xmlmod.__file__, str(self.path / "xmlmod.xml"))
+
+    def test_import_package(self):
+        import xmlpkg.sub
+
+        self.assertEqual(xmlpkg.name, "Batuhan")
+        self.assertEqual(xmlpkg.sub.age, 15)
+
+    def test_bytecode_cache(self):
+        source = self.path / "xmlmod.xml"
+        importlib.import_module("xmlmod")
+        self.assertTrue(cache_from_source(source).exists())
+        self.assertFalse(Path(importlib.util.cache_from_source(str(source))).exists())
+
+        self.forget()
+        with mock.patch.object(Compiler, "_compile") as compile:
+            module = importlib.import_module("xmlmod")
+
+        compile.assert_not_called()
+        self.assertEqual(module.age, 15)
+
+    def test_shared_cache(self):
+        source = self.path / "xmlmod.xml"
+        Compiler().load(source)
+
+        with mock.patch.object(Compiler, "_compile") as compile:
+            module = importlib.import_module("xmlmod")
+
+        compile.assert_not_called()
+        self.assertEqual(module.age, 15)
+
+
+if __name__ == "__main__":
+    unittest.main()
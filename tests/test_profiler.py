@@ -0,0 +1,32 @@
+import unittest
+
+from pathlib import Path
+from xmllang.compiler import Compiler
+from xmllang.parser import Parser
+from xmllang.profiler import Profiler
+
+PATH = Path(__file__).parent / "parser" / "demo"
+
+
+class TestProfiler(unittest.TestCase):
+    def test_parser_tracer(self):
+        profiler = Profiler()
+        Parser.fromfile(PATH / "test_parser_types" / "dict.xml", profiler).parse()
+        stats = profiler.stats()
+
+        self.assertEqual(set(stats.phases), {"fromfile", "_parse", "build_module"})
+        self.assertEqual(stats.tags["item"].calls, 8)
+        self.assertEqual(stats.tags["dict"].calls, 3)
+        self.assertEqual(stats.rules["DictItem"].calls, 8)
+
+    def test_compiler_profile(self):
+        stats = Compiler().profile(PATH / "test_parser_names" / "basic.xml")
+
+        self.assertEqual(stats.phases["compile"].calls, 1)
+        self.assertEqual(stats.phases["exec"].calls, 1)
+        self.assertEqual(stats.rules["Name"].calls, 4)
+        self.assertIn("build_module", stats.format())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,16 @@
-from xmllang.compiler.compiler import Compiler
+__all__ = ["AsyncCompiler", "Compiler"]
 
-__all__ = ["Compiler"]
+
+def __getattr__(name):
+    # Imported on first use, so the compile server's client doesn't load
+    # the compiler and the parser
+    if name == "Compiler":
+        from xmllang.compiler.compiler import Compiler
+
+        return Compiler
+    elif name == "AsyncCompiler":
+        from xmllang.compiler.aio import AsyncCompiler
+
+        return AsyncCompiler
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
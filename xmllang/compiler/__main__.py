@@ -1,18 +1,157 @@
-from xmllang.compiler import Compiler
+import argparse
+import os
+import sys
+import time
+
+from py_compile import PycInvalidationMode
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(prog="python -m xmllang.compiler")
+    actions = parser.add_subparsers(dest="action", metavar="ACTION")
+    actions.required = True
+
+    compile_action = actions.add_parser("compile", help="compile a file to bytecode")
+    compile_action.add_argument("file")
+    compile_action.add_argument("to", nargs="?")
+
+    exec_action = actions.add_parser("exec", help="execute a file")
+    exec_action.add_argument("file")
+    exec_action.add_argument(
+        "--profile",
+        action="store_true",
+        help="print time spent per phase and per tag to stderr",
+    )
+
+    for action in (compile_action, exec_action):
+        action.add_argument(
+            "--incremental",
+            action="store_true",
+            help="only rebuild the top-level statements that changed",
+        )
+        action.add_argument(
+            "-j",
+            "--workers",
+            type=int,
+            default=1,
+            help="build the top-level statements of large files on this many "
+            "processes, 0 means one per CPU (default: 1)",
+        )
+
+    compile_all = actions.add_parser(
+        "compile-all", help="compile every file under a directory"
+    )
+    compile_all.add_argument("directory")
+    compile_all.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=0,
+        help="number of worker processes, 0 means one per CPU (default: 0)",
+    )
+    compile_all.add_argument(
+        "-f", "--force", action="store_true", help="recompile up to date files too"
+    )
+    compile_all.add_argument(
+        "--invalidation-mode",
+        choices=[mode.name.lower().replace("_", "-") for mode in PycInvalidationMode],
+        default="timestamp",
+    )
+
+    serve_action = actions.add_parser(
+        "serve", help="run a compile server on a unix domain socket"
+    )
+    serve_action.add_argument(
+        "--cache-size",
+        type=int,
+        default=256,
+        help="number of compiled files kept in memory",
+    )
+    client_action = actions.add_parser(
+        "client", help="send a request to a compile server"
+    )
+    client_action.add_argument(
+        "request",
+        choices=("compile", "exec", "stats", "shutdown"),
+        help="compile or execute a file, print cache statistics or stop the server",
+    )
+    client_action.add_argument("file", nargs="?")
+    client_action.add_argument("to", nargs="?")
+    client_action.add_argument("--incremental", action="store_true")
+
+    for action in (serve_action, client_action):
+        action.add_argument(
+            "-s", "--socket", help="socket path (default: a per user runtime path)"
+        )
+
+    return parser
 
 
 def main(argv):
-    args = argv[1:]
-    compiler = Compiler()
-    if args[0] == "compile":
-        compiler.compile(args[1], args[2])
-    elif args[0] == "exec":
-        compiler.execute(args[1])
-    else:
-        print("Unknown action")
+    args = get_parser().parse_args(argv[1:])
 
+    if args.action == "client":
+        return client(args)
+    elif args.action == "serve":
+        from xmllang.compiler.server import serve
 
-if __name__ == "__main__":
-    import sys
+        serve(args.socket, args.cache_size)
+        return 0
+
+    from xmllang.compiler import Compiler
+
+    if args.action == "compile":
+        compiler = Compiler(incremental=args.incremental, workers=args.workers)
+        return compiler.compile(args.file, args.to)
+    elif args.action == "exec":
+        compiler = Compiler(incremental=args.incremental, workers=args.workers)
+        if args.profile:
+            print(compiler.profile(args.file), file=sys.stderr)
+        else:
+            compiler.execute(args.file)
+    elif args.action == "compile-all":
+        from xmllang.compiler.compileall import compile_dir, format_summary
 
-    main(sys.argv)
+        mode = PycInvalidationMode[args.invalidation_mode.upper().replace("-", "_")]
+
+        start = time.perf_counter()
+        results = compile_dir(args.directory, args.workers, args.force, mode)
+        print(format_summary(results, time.perf_counter() - start))
+
+        return int(any(result.status == "failed" for result in results))
+
+    return 0
+
+
+def client(args):
+    from xmllang.compiler.client import ServerError, request, unpack_code
+
+    fields = {}
+    if args.request in {"compile", "exec"}:
+        if args.file is None:
+            print(f"client {args.request}: a file is required", file=sys.stderr)
+            return 2
+
+        fields["file"] = os.path.abspath(args.file)
+        fields["incremental"] = args.incremental
+        if args.to is not None:
+            fields["to"] = os.path.abspath(args.to)
+
+    action = "load" if args.request == "exec" else args.request
+    try:
+        payload = request(action, args.socket, **fields)
+        code = unpack_code(payload) if args.request == "exec" else None
+    except (OSError, ServerError) as exc:
+        print(f"client {args.request}: {exc}", file=sys.stderr)
+        return 1
+
+    if code is not None:
+        exec(code, {"__name__": "__main__"})
+    elif payload:
+        print(payload.decode())
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,153 @@
+"""Asyncio front end of :py:class:`xmllang.compiler.Compiler`
+
+File reads and writes run on the event loop's default executor and the
+CPU bound parse, build and compile steps on a configurable one (threads
+by default, pass a ``ProcessPoolExecutor`` to use more cores), so the
+event loop is never blocked.
+"""
+
+import asyncio
+import marshal
+import os
+import sys
+import time
+from concurrent.futures import Executor
+from pathlib import Path
+from py_compile import PycInvalidationMode
+from types import CodeType
+from typing import AsyncIterator, Iterable, Optional, Tuple
+
+from xmllang.compiler.compileall import CompileResult
+from xmllang.compiler.compiler import Compiler, cache_from_source
+from xmllang.compiler.sourcemap import SourceMap, map_path
+
+
+def build_pyc(
+    data: bytes,
+    path: Path,
+    invalidation_mode: PycInvalidationMode = PycInvalidationMode.TIMESTAMP,
+    incremental: bool = False,
+    backend: str = "expat",
+) -> Tuple[bytes, bytes]:
+    """Compiles the source of path and returns its bytecode file content
+    and encoded source map. Picklable, so it can run on a process pool."""
+
+    compiler = Compiler(invalidation_mode, incremental, backend=backend)
+    roots = []
+    code = compiler._compile(data, path=path, roots=roots)
+    pyc = bytes(compiler._get_header_pyc(code, path, data))
+    return pyc, SourceMap.of(data, *roots).dumps()
+
+
+class AsyncCompiler:
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        invalidation_mode: PycInvalidationMode = PycInvalidationMode.TIMESTAMP,
+        incremental: bool = False,
+        backend: str = "expat",
+    ) -> None:
+        self.executor = executor
+        self.compiler = Compiler(invalidation_mode, incremental, backend=backend)
+
+    async def compile(self, f: os.PathLike, to: Optional[os.PathLike] = None) -> int:
+        """Takes filename and bytecode file destination and returns
+        a status code"""
+
+        f = Path(os.fspath(f))
+        to = Path(os.fspath(to)) if to is not None else f.with_suffix(".xmlc")
+
+        data = await self._io(f.read_bytes)
+        pyc, source_map = await self._build(f, data)
+        await self._io(Compiler._write_atomic, to, pyc)
+        await self._io(Compiler._write_atomic, map_path(to), source_map)
+
+        return 0
+
+    async def load(self, f: os.PathLike) -> CodeType:
+        """Returns code object of given file, see :py:meth:`Compiler.load`"""
+
+        f = Path(os.fspath(f))
+
+        pyc, data = await self._io(self.compiler._find_cached, f)
+        if pyc is None:
+            if data is None:
+                data = await self._io(f.read_bytes)
+
+            pyc, source_map = await self._build(f, data)
+            await self._io(self._write_cache, f, pyc, source_map)
+
+        return marshal.loads(pyc[16:])
+
+    async def execute(self, f: os.PathLike) -> None:
+        """Loads given file without blocking and executes it on the
+        event loop's thread"""
+
+        exec(await self.load(f), {})
+
+    async def compile_many(
+        self, paths: Iterable[os.PathLike], concurrency: int = 8
+    ) -> AsyncIterator[CompileResult]:
+        """Compiles paths with :py:meth:`compile` and yields a result per
+        path as they finish. At most concurrency files are in flight, and
+        no more are started while finished results wait to be consumed.
+        Leaving the iteration early cancels the files in flight."""
+
+        paths = iter(paths)
+        results = asyncio.Queue(concurrency)
+
+        async def worker():
+            for path in paths:
+                await results.put(await self._compile_result(Path(os.fspath(path))))
+            await results.put(None)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+        try:
+            running = len(workers)
+            while running:
+                result = await results.get()
+                if result is None:
+                    running -= 1
+                else:
+                    yield result
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _compile_result(self, path: Path) -> CompileResult:
+        start = time.perf_counter()
+        try:
+            await self.compile(path)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            return CompileResult(path, "failed", time.perf_counter() - start, error)
+
+        return CompileResult(path, "compiled", time.perf_counter() - start)
+
+    async def _build(self, f: Path, data: bytes) -> Tuple[bytes, bytes]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            build_pyc,
+            data,
+            f,
+            self.compiler.invalidation_mode,
+            self.compiler.incremental,
+            self.compiler.backend,
+        )
+
+    def _write_cache(self, f: Path, pyc: bytes, source_map: bytes) -> None:
+        if not sys.dont_write_bytecode:
+            cache = cache_from_source(f)
+            try:
+                Compiler._write_atomic(cache, pyc)
+                Compiler._write_atomic(map_path(cache), source_map)
+            except OSError:
+                pass
+
+    @staticmethod
+    async def _io(func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
@@ -0,0 +1,91 @@
+"""Client of the compile server (:py:mod:`xmllang.compiler.server`)
+
+Only depends on the standard library's socket and json modules, so
+talking to a running server costs no more than starting the interpreter.
+
+The socket directory is checked before connecting: replies of ``load``
+requests are executed, so a directory another user could have created
+(e.g. under ``/tmp``) is refused.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import stat
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from types import CodeType
+    from typing import Optional
+
+
+class ServerError(Exception):
+    """Raised when the compile server fails to handle a request"""
+
+
+def default_socket() -> str:
+    """Returns the per user socket location, inside a directory that only
+    the user can access"""
+
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if not base:
+        import tempfile
+
+        base = tempfile.gettempdir()
+
+    return os.path.join(base, f"xmllang-{os.getuid()}", "compiler.sock")
+
+
+def check_directory(path: os.PathLike) -> None:
+    """Raises PermissionError unless path is a directory (not a symlink)
+    owned by the current user that no one else can access"""
+
+    st = os.lstat(path)
+    if (
+        not stat.S_ISDIR(st.st_mode)
+        or st.st_uid != os.getuid()
+        or stat.S_IMODE(st.st_mode) & 0o077
+    ):
+        raise PermissionError(
+            f"{os.fspath(path)} must be a directory owned by the current user "
+            f"with mode 0700"
+        )
+
+
+def unpack_code(payload: bytes) -> CodeType:
+    """Returns the code object of a ``load`` reply, which starts with the
+    magic number of the interpreter that marshalled it"""
+
+    import marshal
+    from importlib.util import MAGIC_NUMBER
+
+    if payload[:4] != MAGIC_NUMBER:
+        raise ServerError("bytecode of another interpreter version")
+
+    return marshal.loads(payload[4:])
+
+
+def request(
+    action: str, path: Optional[os.PathLike] = None, **fields
+) -> bytes:
+    """Sends a request to the server listening on path and returns the
+    payload of its reply"""
+
+    path = os.fspath(path) if path is not None else default_socket()
+    check_directory(os.path.dirname(os.path.abspath(path)))
+    message = json.dumps({"action": action, **fields}).encode() + b"\n"
+
+    with socket.socket(socket.AF_UNIX) as client:
+        client.connect(path)
+        client.sendall(message)
+
+        with client.makefile("rb") as reply:
+            header = json.loads(reply.readline())
+            payload = reply.read(header["size"])
+
+    if header["status"] != 0:
+        raise ServerError(header["error"])
+
+    return payload
@@ -0,0 +1,100 @@
+"""Compiles every XMLLang file under a directory tree
+
+Like :py:mod:`compileall`, files whose cached bytecode (see
+:py:func:`xmllang.compiler.compiler.cache_from_source`) is still valid
+are skipped and the rest are compiled on a process pool.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from py_compile import PycInvalidationMode
+from typing import Iterator, List, NamedTuple, Optional
+
+from xmllang.compiler.compiler import Compiler, cache_from_source
+
+SOURCE_SUFFIX = ".xml"
+
+
+class CompileResult(NamedTuple):
+    path: Path
+    status: str  # "compiled", "skipped" or "failed"
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+
+def find_sources(directory: os.PathLike) -> Iterator[Path]:
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+        for name in sorted(files):
+            if name.endswith(SOURCE_SUFFIX):
+                yield Path(root) / name
+
+
+def compile_dir(
+    directory: os.PathLike,
+    workers: int = 0,
+    force: bool = False,
+    invalidation_mode: PycInvalidationMode = PycInvalidationMode.TIMESTAMP,
+) -> List[CompileResult]:
+    """Compiles XMLLang files under directory into their ``__pycache__``.
+    workers is the size of the process pool, 0 means one per CPU and 1
+    compiles in the current process."""
+
+    compiler = Compiler(invalidation_mode)
+    results = []
+    stale = []
+
+    for path in find_sources(directory):
+        if not force and compiler.is_cached(path):
+            results.append(CompileResult(path, "skipped"))
+        else:
+            stale.append(path)
+
+    if workers != 1 and len(stale) > 1:
+        with ProcessPoolExecutor(workers or None) as executor:
+            done = executor.map(
+                compile_file, stale, [invalidation_mode] * len(stale), chunksize=4
+            )
+            results.extend(done)
+    else:
+        results.extend(compile_file(path, invalidation_mode) for path in stale)
+
+    return results
+
+
+def compile_file(
+    path: Path, invalidation_mode: PycInvalidationMode = PycInvalidationMode.TIMESTAMP
+) -> CompileResult:
+    start = time.perf_counter()
+    try:
+        Compiler(invalidation_mode).compile(path, cache_from_source(path))
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        return CompileResult(path, "failed", time.perf_counter() - start, error)
+
+    return CompileResult(path, "compiled", time.perf_counter() - start)
+
+
+def format_summary(results: List[CompileResult], elapsed: float) -> str:
+    counts = {"compiled": 0, "skipped": 0, "failed": 0}
+    for result in results:
+        counts[result.status] += 1
+
+    busy = sum(result.elapsed for result in results)
+    lines = [
+        f"compiled {counts['compiled']}, skipped {counts['skipped']}, "
+        f"failed {counts['failed']} in {elapsed:.2f}s "
+        f"({busy:.2f}s spent compiling)"
+    ]
+
+    compiled = [result for result in results if result.status == "compiled"]
+    for result in sorted(compiled, key=lambda result: -result.elapsed)[:5]:
+        lines.append(f"  {result.elapsed:8.3f}s {result.path}")
+
+    for result in results:
+        if result.status == "failed":
+            lines.append(f"FAILED {result.path}: {result.error}")
+
+    return "\n".join(lines)
@@ -1,46 +1,401 @@
+from __future__ import annotations
+
 import marshal
 import os
+import sys
+import threading
 import importlib.util
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from py_compile import PycInvalidationMode
 from xmllang.parser import Parser
+from xmllang.parser.source import mapped
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from types import CodeType
+    from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+    from xmllang.compiler.incremental import StatementCache
+    from xmllang.parser.parser import ParseNode
+    from xmllang.parser.source import Buffer
+    from xmllang.profiler import ProfileStats
 
 MAGIC_NUMBER = importlib.util.MAGIC_NUMBER
+BYTECODE_SUFFIX = ".xmlc"
+
+FLAG_HASH_BASED = 0b01
+FLAG_CHECK_SOURCE = 0b10
+
+
+def cache_from_source(path: os.PathLike) -> Path:
+    """Returns the ``__pycache__`` location of given XMLLang file's bytecode"""
+
+    path = Path(os.fspath(path))
+    name = f"{path.stem}.{sys.implementation.cache_tag}{BYTECODE_SUFFIX}"
+    return path.parent / "__pycache__" / name
+
+
+class CodeCache:
+    """In memory LRU of code objects, keyed by the digest of their source.
+    Holds at most ``maxsize`` code objects (``None`` for no limit, ``0``
+    disables caching), the least recently used one is evicted first."""
+
+    def __init__(self, maxsize: Optional[int] = 256) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._codes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[bytes, str]) -> Optional[CodeType]:
+        with self._lock:
+            code = self._codes.get(key)
+            if code is None:
+                self.misses += 1
+            else:
+                self._codes.move_to_end(key)
+                self.hits += 1
+            return code
+
+    def put(self, key: Tuple[bytes, str], code: CodeType) -> None:
+        if self.maxsize == 0:
+            return
+
+        with self._lock:
+            self._codes[key] = code
+            self._codes.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self._codes) > self.maxsize:
+                    self._codes.popitem(last=False)
+                    self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._codes.clear()
+
+    def stats(self) -> Dict[str, Optional[int]]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self),
+            "maxsize": self.maxsize,
+        }
+
+    def __len__(self) -> int:
+        return len(self._codes)
 
 
 class Compiler:
+    """Compiles XMLLang documents to code objects and bytecode files.
+
+    backend is the parser backend of serial builds (see
+    :py:meth:`xmllang.parser.Parser.fromfile`). ``expat`` knows the
+    position of every element, so tracebacks point into the document.
+    ``etree`` parses faster but places all code at line 1, pick it when
+    locations don't matter. Incremental and parallel builds always use
+    expat."""
+
+    def __init__(
+        self,
+        invalidation_mode: PycInvalidationMode = PycInvalidationMode.TIMESTAMP,
+        incremental: bool = False,
+        cache_size: Optional[int] = 256,
+        workers: int = 1,
+        backend: str = "expat",
+    ) -> None:
+        if backend not in ("expat", "etree"):
+            raise ValueError(f"Unknown backend: {backend!r}")
+
+        self.invalidation_mode = invalidation_mode
+        self.incremental = incremental
+        self.workers = workers
+        self.backend = backend
+        self.code_cache = CodeCache(cache_size)
+        # statement caches of incremental builds, by source path
+        self.statements = {}
+        self._statements_lock = threading.Lock()
+
     def compile(self, f: os.PathLike, to: Optional[os.PathLike] = None) -> int:
         """Takes filename and bytecode file destination and returns
-        a status code"""
+        a status code. The source map is written next to the bytecode."""
 
-        f = Path(os.fspath(f))
-        to = Path(os.fspath(to)) or f.with_suffix(".xmlc")
+        from xmllang.compiler.sourcemap import write_source_map
 
-        parser = Parser.fromfile(f.resolve())
-        module = parser.parse()
+        f = Path(os.fspath(f))
+        to = Path(os.fspath(to)) if to is not None else f.with_suffix(".xmlc")
 
-        code = compile(module, "<ast>", "exec")
-        pyc = self._get_pyc(code)
+        with mapped(f) as data:
+            roots = []
+            code = self._compile(data, path=f, roots=roots)
+            pyc = self._get_header_pyc(code, f, data)
 
-        with open(to, "wb") as dest:
-            dest.write(pyc)
+            self._write_atomic(to, pyc)
+            write_source_map(to, data, *roots)
 
         return 0
 
+    def compile_many(
+        self, sources: Iterable[Union[str, Buffer]], filename: str = "<ast>"
+    ) -> List[Union[CodeType, Exception]]:
+        """Compiles documents held in memory (strings or bytes-like
+        objects) and returns a code object for each one, or the exception
+        it raised. The documents are built by a single parser, so they
+        share its string table and dispatch, every document is built with
+        its own :py:class:`xmllang.parser.parser.BuildState` (literals are
+        only shared within a document)."""
+
+        from xmllang.parser.expat import Document, fromstring
+        from xmllang.parser.strings import InternTable
+
+        strings = InternTable()
+        parser = None
+        results = []
+        for source in sources:
+            try:
+                root = fromstring(source, strings=strings)
+                if parser is None:
+                    parser = Parser(Document(root), strings=strings)
+
+                results.append(compile(parser.parse(root), filename, "exec"))
+            except Exception as exc:
+                results.append(exc)
+
+        return results
+
     def execute(self, f: os.PathLike):
-        parser = Parser.fromfile(f)
+        code = self.load(f)
+        exec(code, {})
+
+    def run(
+        self,
+        source: Union[os.PathLike, str, Buffer],
+        globals: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Executes source (a path object, or a document in a string or a
+        bytes-like object, as with :py:meth:`compile_many`) in a new
+        namespace, a copy of globals when given, and returns that
+        namespace. Code objects are kept in :py:attr:`code_cache` by the
+        digest of the source, so running the same document again skips
+        parsing and compiling."""
+
+        if isinstance(source, os.PathLike):
+            path = Path(os.fspath(source))
+            with mapped(path) as data:
+                code = self._cached_code(data, path)
+        elif isinstance(source, str):
+            code = self._cached_code(source.encode())
+        else:
+            code = self._cached_code(source)
+
+        namespace = {} if globals is None else dict(globals)
+        exec(code, namespace)
+        return namespace
+
+    def _cached_code(self, data: Buffer, path: Optional[Path] = None) -> CodeType:
+        import hashlib
+
+        filename = "<ast>" if path is None else os.fspath(path)
+        key = hashlib.blake2b(data, digest_size=16).digest(), filename
+
+        code = self.code_cache.get(key)
+        if code is None:
+            code = self._compile(data, filename, path)
+            self.code_cache.put(key, code)
+
+        return code
+
+    def profile(self, f: os.PathLike, execute: bool = True) -> ProfileStats:
+        """Compiles given file (bypassing the bytecode cache) and optionally
+        executes it under a :py:class:`xmllang.profiler.Profiler`, returns
+        the collected stats."""
+
+        from xmllang.profiler import Profiler
+
+        profiler = Profiler()
+        parser = Parser.fromfile(f, tracer=profiler, backend=self.backend)
         module = parser.parse()
 
-        code = compile(module, "<ast>", "exec")
-        exec(code)
+        with profiler.phase("compile"):
+            code = compile(module, os.fspath(f), "exec")
+
+        if execute:
+            with profiler.phase("exec"):
+                exec(code, {})
+
+        return profiler.stats()
+
+    def load(self, f: os.PathLike) -> CodeType:
+        """Returns code object of given file. Uses the cached bytecode
+        when it is still valid for the source, otherwise compiles the
+        source once and refreshes the cache."""
+
+        f = Path(os.fspath(f))
+
+        pyc, data = self._find_cached(f)
+        if pyc is not None:
+            return marshal.loads(pyc[16:])
+
+        if data is None:
+            with mapped(f) as data:
+                return self._load_source(f, data)
+
+        return self._load_source(f, data)
+
+    def _load_source(self, f: Path, data: Buffer) -> CodeType:
+        roots = []
+        code = self._compile(data, path=f, roots=roots)
+
+        if not sys.dont_write_bytecode:
+            from xmllang.compiler.sourcemap import write_source_map
+
+            cache = cache_from_source(f)
+            try:
+                self._write_atomic(cache, self._get_header_pyc(code, f, data))
+                write_source_map(cache, data, *roots)
+            except OSError:
+                pass
+
+        return code
+
+    def is_cached(self, f: os.PathLike) -> bool:
+        """Tells whether given file has cached bytecode that is still valid"""
+
+        pyc, _ = self._find_cached(Path(os.fspath(f)))
+        return pyc is not None
+
+    def _find_cached(self, f: Path) -> Tuple[Optional[bytes], Optional[bytes]]:
+        """Returns the valid cached bytecode of f (or None) and the
+        source, if it had to be read for the validation."""
+
+        try:
+            pyc = cache_from_source(f).read_bytes()
+        except OSError:
+            return None, None
+
+        flags = self._validate_header(pyc)
+        if flags is None:
+            return None, None
+        elif not flags & FLAG_HASH_BASED:
+            st = os.stat(f)
+            if pyc[8:16] == self._w_long(st.st_mtime) + self._w_long(st.st_size):
+                return pyc, None
+        elif flags & FLAG_CHECK_SOURCE:
+            data = f.read_bytes()
+            if pyc[8:16] == importlib.util.source_hash(data):
+                return pyc, data
+            return None, data
+        else:
+            return pyc, None
+
+        return None, None
+
+    def _compile(
+        self,
+        data: Buffer,
+        filename: Optional[str] = None,
+        path: Optional[Path] = None,
+        roots: Optional[List[ParseNode]] = None,
+    ) -> CodeType:
+        """Compiles source data, code locations are the positions of the
+        XML elements in path (or filename), so tracebacks point into the
+        source document. Unless this compiler is incremental, large
+        documents are built on workers processes (0 means one per CPU),
+        see :py:mod:`xmllang.compiler.parallel`.
+
+        If a roots list is given, the root of the expat parse tree the
+        module was built from is appended to it (the source map is read
+        from it). Incremental, parallel and etree builds keep no expat
+        tree of the whole document and append nothing."""
+
+        if filename is None:
+            filename = "<ast>" if path is None else os.fspath(path)
+
+        if self.incremental and path is not None:
+            from xmllang.compiler.incremental import IncrementalBuilder
+
+            builder = IncrementalBuilder(self._statement_cache(path))
+            module = builder.build(data)
+        elif self.workers != 1:
+            from xmllang.compiler.parallel import build_parallel
+
+            module = build_parallel(data, path, self.workers)
+        else:
+            parser = Parser.frombuffer(data, backend=self.backend)
+            module = parser.parse()
+            if roots is not None and self.backend == "expat":
+                roots.append(parser.root)
+
+        return compile(module, filename, "exec")
+
+    def _statement_cache(self, path: Path) -> StatementCache:
+        """Returns the statement cache of path, its sidecar is only read
+        by the first incremental build of the path with this compiler"""
+
+        from xmllang.compiler.incremental import StatementCache, cache_path
+
+        with self._statements_lock:
+            cache = self.statements.get(path)
+            if cache is None:
+                cache = self.statements[path] = StatementCache(cache_path(path))
+            return cache
+
+    def _get_header_pyc(self, code, f, data):
+        if self.invalidation_mode is PycInvalidationMode.TIMESTAMP:
+            st = os.stat(f)
+            return self._get_pyc(code, st.st_mtime, st.st_size)
+        else:
+            checked = self.invalidation_mode is PycInvalidationMode.CHECKED_HASH
+            return self._get_hash_pyc(code, importlib.util.source_hash(data), checked)
 
     def _get_pyc(self, code, time=0, sourcesize=0):
         pyc = bytearray(MAGIC_NUMBER)
+        pyc.extend(self._w_long(0))
         pyc.extend(self._w_long(time))
         pyc.extend(self._w_long(sourcesize))
         pyc.extend(marshal.dumps(code))
         return pyc
 
+    def _get_hash_pyc(self, code, source_hash, checked=True):
+        pyc = bytearray(MAGIC_NUMBER)
+        flags = FLAG_HASH_BASED | (FLAG_CHECK_SOURCE if checked else 0)
+        pyc.extend(self._w_long(flags))
+        pyc.extend(source_hash)
+        pyc.extend(marshal.dumps(code))
+        return pyc
+
+    @staticmethod
+    def _validate_header(pyc) -> Optional[int]:
+        """Returns flags of a bytecode file, or None when it can't be used"""
+
+        if len(pyc) < 16 or pyc[:4] != MAGIC_NUMBER:
+            return None
+
+        flags = int.from_bytes(pyc[4:8], "little")
+        if flags & ~(FLAG_HASH_BASED | FLAG_CHECK_SOURCE):
+            return None
+
+        return flags
+
+    @staticmethod
+    def _write_atomic(path, data):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{id(data)}")
+        fd = os.open(tmp, os.O_EXCL | os.O_CREAT | os.O_WRONLY, 0o666)
+        try:
+            with open(fd, "wb") as dest:
+                dest.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
     @staticmethod
     def _w_long(x):
         return (int(x) & 0xFFFFFFFF).to_bytes(4, "little")
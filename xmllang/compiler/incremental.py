@@ -0,0 +1,200 @@
+"""Incremental builds at top-level statement granularity
+
+Every child of the root becomes one independent statement. The raw
+bytes of each child are fingerprinted and the statements built from
+them are kept in a sidecar cache (``__pycache__/NAME.<tag>.xmli``), so
+rebuilding a document only parses and builds the children that changed.
+Statements are cached with the position of their child and moved when an
+edit above them shifts it. Each statement is built with its own
+:py:class:`xmllang.parser.parser.BuildState`, so literals are only shared
+within a statement and a repeated literal of a later statement keeps
+its own position (a serial build places it at the first copy).
+"""
+
+import ast
+import hashlib
+import os
+import pickle
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from xml.parsers import expat
+
+from xmllang.compiler.compiler import MAGIC_NUMBER, Compiler, cache_from_source
+from xmllang.parser import Parser
+from xmllang.parser.expat import Document, Node, fromstring
+
+CACHE_SUFFIX = ".xmli"
+CACHE_VERSION = 3
+UTF8 = {"utf-8", "utf8"}
+
+Entry = Tuple[int, int, ast.stmt]
+
+
+def cache_path(source: os.PathLike) -> Path:
+    return cache_from_source(source).with_suffix(CACHE_SUFFIX)
+
+
+def scan(data: bytes) -> Optional[List[Tuple[int, int, int, int]]]:
+    """Returns byte spans of the root's children with the line and column
+    they start at, each span runs until the next child (or the root's end
+    tag). Returns None if the document can't be sliced (e.g. it declares a
+    non UTF-8 encoding)."""
+
+    parser = expat.ParserCreate()
+    starts = []
+    positions = []
+    depth = 0
+    root_end = None
+    encoding = None
+
+    def xml_decl(version, declared, standalone):
+        nonlocal encoding
+        encoding = declared
+
+    def start(tag, attrib):
+        nonlocal depth
+        if depth == 1:
+            starts.append(parser.CurrentByteIndex)
+            positions.append((parser.CurrentLineNumber, parser.CurrentColumnNumber))
+        depth += 1
+
+    def end(tag):
+        nonlocal depth, root_end
+        depth -= 1
+        if depth == 0:
+            root_end = parser.CurrentByteIndex
+
+    parser.XmlDeclHandler = xml_decl
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.Parse(data, True)
+
+    if encoding is not None and encoding.lower() not in UTF8:
+        return None
+
+    return [
+        (start, end, lineno, col_offset)
+        for start, end, (lineno, col_offset) in zip(
+            starts, starts[1:] + [root_end], positions
+        )
+    ]
+
+
+def relocate(stmt: ast.stmt, lines: int, columns: int, first_line: int) -> None:
+    """Moves a statement down by lines, nodes on its first line are also
+    moved right by columns. Repeated literals of the statement share their
+    nodes, every node is moved once."""
+
+    seen = set()
+    stack = [stmt]
+    while stack:
+        node = stack.pop()
+        if node in seen:
+            continue
+        seen.add(node)
+
+        if "lineno" in node._attributes:
+            if node.lineno == first_line:
+                node.col_offset += columns
+            node.lineno += lines
+        stack.extend(ast.iter_child_nodes(node))
+
+
+class StatementCache:
+    """Fingerprint to statement ASTs (and the line and column each one was
+    built at) mapping, a statement per copy of a child in the document,
+    stored next to the bytecode. Cached statements are moved in place, so
+    builds holding the same cache take its lock (a
+    :py:class:`xmllang.compiler.Compiler` keeps one cache per path)."""
+
+    def __init__(self, path: os.PathLike) -> None:
+        self.path = Path(os.fspath(path))
+        self.statements = self._load()
+        self.lock = threading.Lock()
+
+    def _load(self) -> Dict[bytes, List[Entry]]:
+        try:
+            with open(self.path, "rb") as cache:
+                magic, version, statements = pickle.load(cache)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            return {}
+
+        if magic != MAGIC_NUMBER or version != CACHE_VERSION:
+            return {}
+
+        return statements
+
+    def save(self, statements: Dict[bytes, List[Entry]]) -> None:
+        data = pickle.dumps(
+            (MAGIC_NUMBER, CACHE_VERSION, statements), pickle.HIGHEST_PROTOCOL
+        )
+        Compiler._write_atomic(self.path, data)
+        self.statements = statements
+
+
+class IncrementalBuilder:
+    """Builds modules reusing the statements of unchanged root children"""
+
+    def __init__(self, cache: StatementCache) -> None:
+        self.cache = cache
+        self.reused = 0
+        self.rebuilt = 0
+
+    def build(self, data: bytes) -> ast.Module:
+        spans = scan(data)
+        if spans is None:
+            return Parser.frombuffer(data, backend="expat").parse()
+
+        with self.cache.lock:
+            return self._build(data, spans)
+
+    def _build(
+        self, data: bytes, spans: List[Tuple[int, int, int, int]]
+    ) -> ast.Module:
+        parser = Parser(Document(Node("xmllang")))
+        cached = self.cache.statements
+        statements = {}
+        body = []
+
+        for start, end, lineno, col_offset in spans:
+            chunk = data[start:end]
+            fingerprint = hashlib.blake2b(chunk, digest_size=16).digest()
+
+            # every copy of a repeated child has a statement of its own
+            copies = statements.setdefault(fingerprint, [])
+            entries = cached.get(fingerprint, ())
+            entry = entries[len(copies)] if len(copies) < len(entries) else None
+            if entry is None:
+                node = fromstring(
+                    b"<xmllang>" + chunk + b"</xmllang>",
+                    lineno - 1,
+                    col_offset - len(b"<xmllang>"),
+                    parser.strings,
+                )[0]
+                stmt = parser.build_statement(node)
+                self.rebuilt += 1
+            else:
+                cached_lineno, cached_col_offset, stmt = entry
+                if (cached_lineno, cached_col_offset) != (lineno, col_offset):
+                    relocate(
+                        stmt,
+                        lineno - cached_lineno,
+                        col_offset - cached_col_offset,
+                        cached_lineno,
+                    )
+                self.reused += 1
+
+            copies.append((lineno, col_offset, stmt))
+            body.append(stmt)
+
+        if statements != cached:
+            self.cache.statements = statements
+            if not sys.dont_write_bytecode:
+                try:
+                    self.cache.save(statements)
+                except OSError:
+                    pass
+
+        return ast.Module(body)
@@ -0,0 +1,206 @@
+"""Parallel builds of a single document
+
+Every child of the root becomes one independent statement, so a large
+document is split (see :py:func:`xmllang.compiler.incremental.scan`)
+into shards of consecutive children that are built on a process pool.
+Workers read their shard from the source file (or get its bytes, for
+documents held in memory) and send back the pickled statements, which
+are put together in source order. The module is equal to the one a
+serial build returns, positions included: a serial build shares repeated
+literals and places them at their first copy, so literals that an
+earlier shard already built are moved to the position of its copy.
+"""
+
+import ast
+import gc
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from xmllang.compiler.incremental import scan
+from xmllang.parser import Parser
+from xmllang.parser.expat import Document, fromstring
+from xmllang.parser.parser import BuildState
+from xmllang.parser.source import mapped
+from xmllang.parser.strings import InternTable
+
+# documents smaller than this (in bytes) are built in the current process
+MIN_SIZE = 1 << 20
+SHARDS_PER_WORKER = 4
+
+Span = Tuple[int, int, int, int]
+Literal = Tuple[tuple, Any]
+
+
+def split(spans: List[Span], count: int) -> List[Span]:
+    """Groups consecutive spans into at most count shards of about the
+    same size, returns the span of every shard"""
+
+    target = (spans[-1][1] - spans[0][0]) / count
+    shards = []
+    first = None
+    for span in spans:
+        if first is None:
+            first = span
+        if span[1] - first[0] >= target:
+            shards.append((first[0], span[1], first[2], first[3]))
+            first = None
+
+    if first is not None:
+        shards.append((first[0], spans[-1][1], first[2], first[3]))
+
+    return shards
+
+
+def build_parallel(
+    data: bytes,
+    path: Optional[os.PathLike] = None,
+    workers: int = 0,
+    min_size: Optional[int] = None,
+) -> ast.Module:
+    """Builds the module of a document on workers processes (0 means one
+    per CPU). data is the document, path its file, if it has one, so
+    workers can read their shards themselves. Documents smaller than
+    min_size (:py:data:`MIN_SIZE` by default) and ones that can't be
+    sliced are built serially."""
+
+    if min_size is None:
+        min_size = MIN_SIZE
+
+    workers = workers or os.cpu_count() or 1
+    spans = scan(data) if workers > 1 and len(data) >= min_size else None
+    if not spans or len(spans) < 2:
+        return Parser.frombuffer(data, backend="expat").parse()
+
+    shards = split(spans, min(len(spans), workers * SHARDS_PER_WORKER))
+    with ProcessPoolExecutor(min(workers, len(shards))) as executor:
+        # workers are started by the first submit, objects of this
+        # process are left out of their collections (and so aren't
+        # copied into them on write)
+        with frozen_gc():
+            if path is not None:
+                path = os.fspath(path)
+                futures = [
+                    executor.submit(build_file_shard, path, *shard) for shard in shards
+                ]
+            else:
+                futures = [
+                    executor.submit(
+                        build_shard, bytes(data[start:end]), lineno, col_offset
+                    )
+                    for start, end, lineno, col_offset in shards
+                ]
+
+        body = []
+        firsts = {}
+        for future in futures:
+            shard = future.result()
+            with paused_gc():
+                statements, literals = pickle.loads(shard)
+            place(literals, firsts)
+            body.extend(statements)
+
+    return ast.Module(body)
+
+
+def place(literals: List[Literal], firsts: Dict[tuple, Any]) -> None:
+    """Records the literals of a shard (see :py:func:`first_copies`) that
+    no earlier shard built in firsts, and moves the others to the
+    position of their first copy"""
+
+    for key, value in literals:
+        first = firsts.setdefault(key, value)
+        if first is not value:
+            move(value, first)
+
+
+def move(value: Any, first: Any) -> None:
+    """Gives the nodes of a literal's value the positions of the same
+    nodes in the value of another copy"""
+
+    if type(value) is tuple:
+        pairs = list(zip(value, first))
+    else:
+        pairs = [(value, first)]
+
+    while pairs:
+        node, source = pairs.pop()
+        if not isinstance(node, ast.AST):
+            continue
+
+        if "lineno" in node._attributes:
+            node.lineno = source.lineno
+            node.col_offset = source.col_offset
+        pairs.extend(zip(ast.iter_child_nodes(node), ast.iter_child_nodes(source)))
+
+
+@contextmanager
+def frozen_gc() -> Iterator[None]:
+    gc.freeze()
+    try:
+        yield
+    finally:
+        gc.unfreeze()
+
+
+@contextmanager
+def paused_gc() -> Iterator[None]:
+    """Unpickled statements hold no reference cycles, but every node
+    allocated would count towards a collection that walks the whole
+    body built so far"""
+
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def build_file_shard(
+    path: str, start: int, end: int, lineno: int, col_offset: int
+) -> bytes:
+    with mapped(Path(path)) as data:
+        return build_shard(data[start:end], lineno, col_offset)
+
+
+def build_shard(chunk: bytes, lineno: int, col_offset: int) -> bytes:
+    """Builds the statements of a shard (consecutive children of the root
+    that start at lineno and col_offset) and returns them pickled, along
+    with the first copies of their literals"""
+
+    strings = InternTable()
+    root = fromstring(
+        b"<xmllang>" + chunk + b"</xmllang>",
+        lineno - 1,
+        col_offset - len(b"<xmllang>"),
+        strings,
+    )
+    parser = Parser(Document(root), strings=strings)
+    state = BuildState()
+    statements = [parser.build_statement(node, state) for node in root]
+
+    return pickle.dumps((statements, first_copies(state)), pickle.HIGHEST_PROTOCOL)
+
+
+def first_copies(state: BuildState) -> List[Literal]:
+    """Returns the literals of a build with keys that are the same in every
+    build (the structure numbers of their children are replaced by the
+    keys of the children), children before their parents"""
+
+    keys = {}
+    literals = []
+    structures = sorted(state.structures.items(), key=itemgetter(1))
+    for key, structure in structures:
+        key = keys[structure] = tuple(
+            keys[item] if type(item) is int else item for item in key
+        )
+        if structure in state.literals:
+            literals.append((key, state.literals[structure]))
+
+    return literals
@@ -0,0 +1,156 @@
+"""Compile server
+
+A long running process that compiles XMLLang files for clients connecting
+over a Unix domain socket, so build jobs don't pay for interpreter start,
+imports and cold caches on every file. Bytecode is kept in memory per
+source (invalidated by its mtime and size) and so are the statement caches
+of incremental builds.
+
+Every request is a single JSON line, e.g. ``{"action": "compile", "file":
+"a.xml", "to": null, "incremental": false}``. The reply is a JSON line
+``{"status": 0, "error": null, "size": N}`` followed by N bytes of payload
+(for ``load`` requests, the magic number followed by the marshalled code
+object). The socket lives in a directory only the user can access, the
+server refuses to start in any other.
+
+    python -m xmllang.compiler serve [--socket PATH]
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from xmllang.compiler.client import check_directory, default_socket
+from xmllang.compiler.compiler import CodeCache, Compiler
+from xmllang.compiler.sourcemap import SourceMap, map_path
+from xmllang.parser.source import mapped
+
+
+class CompileHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            payload = self.server.dispatch(request)
+        except Exception as exc:
+            self.reply(1, f"{type(exc).__name__}: {exc}")
+        else:
+            self.reply(0, None, payload)
+
+    def reply(self, status, error, payload=b""):
+        header = {"status": status, "error": error, "size": len(payload)}
+        self.wfile.write(json.dumps(header).encode() + b"\n")
+        if payload:
+            self.wfile.write(payload)
+
+
+class CompileServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves every client on its own thread. Compiled files are kept in
+    memory as bytecode (header included) with their source map and reused
+    until their source changes, at most cache_size of them (``None`` for
+    no limit), the least recently used one is evicted first."""
+
+    daemon_threads = True
+
+    def __init__(
+        self, path: Optional[os.PathLike] = None, cache_size: Optional[int] = 256
+    ) -> None:
+        self.path = Path(os.fspath(path) if path is not None else default_socket())
+        self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        check_directory(self.path.parent)
+        self._remove_stale()
+
+        super().__init__(str(self.path), CompileHandler)
+
+        self.compilers = {
+            incremental: Compiler(incremental=incremental)
+            for incremental in (False, True)
+        }
+        # (path, incremental) -> stamp, bytecode and source map
+        self.bytecode = CodeCache(cache_size)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _remove_stale(self) -> None:
+        if not self.path.exists():
+            return
+
+        with socket.socket(socket.AF_UNIX) as client:
+            try:
+                client.connect(str(self.path))
+            except OSError:
+                self.path.unlink()
+            else:
+                raise OSError(f"a compile server is already running on {self.path}")
+
+    def dispatch(self, request: Dict) -> bytes:
+        action = request["action"]
+        if action == "compile":
+            to = request.get("to")
+            source = Path(request["file"])
+            to = Path(to) if to is not None else source.with_suffix(".xmlc")
+
+            incremental = request.get("incremental", False)
+            pyc, source_map = self.get_bytecode(source, incremental)
+            Compiler._write_atomic(to, pyc)
+            Compiler._write_atomic(map_path(to), source_map.dumps())
+            return b""
+        elif action == "load":
+            source = Path(request["file"])
+            pyc, _ = self.get_bytecode(source, request.get("incremental", False))
+            return pyc[:4] + pyc[16:]
+        elif action == "stats":
+            return json.dumps({"hits": self.hits, "misses": self.misses}).encode()
+        elif action == "shutdown":
+            threading.Thread(target=self.shutdown).start()
+            return b""
+        else:
+            raise ValueError(f"Unknown action: {action!r}")
+
+    def get_bytecode(
+        self, source: Path, incremental: bool
+    ) -> Tuple[bytes, SourceMap]:
+        """Returns bytecode and source map of given source, from memory
+        when the source didn't change since it was last compiled"""
+
+        source = source.resolve()
+        st = os.stat(source)
+        key = source, incremental
+        stamp = st.st_mtime_ns, st.st_size
+
+        cached = self.bytecode.get(key)
+        if cached is not None and cached[0] == stamp:
+            with self._lock:
+                self.hits += 1
+            return cached[1:]
+
+        compiler = self.compilers[incremental]
+        with mapped(source) as data:
+            roots = []
+            code = compiler._compile(data, path=source, roots=roots)
+            pyc = bytes(compiler._get_header_pyc(code, source, data))
+            source_map = SourceMap.of(data, *roots)
+
+        self.bytecode.put(key, (stamp, pyc, source_map))
+        with self._lock:
+            self.misses += 1
+
+        return pyc, source_map
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
+
+
+def serve(
+    path: Optional[os.PathLike] = None, cache_size: Optional[int] = 256
+) -> None:
+    with CompileServer(path, cache_size) as server:
+        server.serve_forever()
@@ -0,0 +1,242 @@
+"""Source maps
+
+Code compiled from an XMLLang document is located at the line and column
+of the element each node was built from. A source map
+(``NAME.xmlmap``, written next to the bytecode) indexes the start
+positions of all elements, so a code location from a traceback can be
+turned back into the path of its element in the document, e.g.
+``/xmllang/config[2]/dict[1]/item[3]``.
+
+The map holds the tag names and four arrays with an entry per element
+in document order: line, column, depth and index of the tag name. It is
+stored as a header (magic and version) and a zlib compressed body with
+the element count, the tag names and the arrays, each in the narrowest
+unsigned type that fits its values (lines as differences to the previous
+element), little endian.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from pathlib import Path
+from xml.parsers import expat
+
+from xmllang.compiler.compiler import Compiler
+from xmllang.parser.source import slices
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Iterable, List, Optional
+    from xmllang.parser.parser import ParseNode
+    from xmllang.parser.source import Buffer
+
+MAP_SUFFIX = ".xmlmap"
+MAP_MAGIC = b"XMLM"
+MAP_VERSION = 2
+
+
+def map_path(bytecode: os.PathLike) -> Path:
+    """Returns the source map location of given bytecode file"""
+
+    return Path(os.fspath(bytecode)).with_suffix(MAP_SUFFIX)
+
+
+def write_source_map(
+    bytecode: os.PathLike, data: Buffer, root: Optional[ParseNode] = None
+) -> None:
+    """Writes the source map of data next to given bytecode file, see
+    :py:meth:`SourceMap.of`"""
+
+    Compiler._write_atomic(map_path(bytecode), SourceMap.of(data, root).dumps())
+
+
+def _pack(values: Iterable[int]) -> array:
+    values = array("I", values)
+    top = max(values, default=0)
+    if top < 1 << 8:
+        values = array("B", values)
+    elif top < 1 << 16:
+        values = array("H", values)
+
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+class SourceMap:
+    def __init__(
+        self,
+        tags: List[str],
+        lines: array,
+        columns: array,
+        depths: array,
+        tag_ids: array,
+    ) -> None:
+        self.tags = tags
+        self.lines = lines
+        self.columns = columns
+        self.depths = depths
+        self.tag_ids = tag_ids
+
+    @classmethod
+    def of(cls, data: Buffer, root: Optional[ParseNode] = None) -> SourceMap:
+        """Returns the map of a document, read from the root of its expat
+        parse tree when the build kept one, otherwise from data"""
+
+        if root is None:
+            return cls.build(data)
+        return cls.from_tree(root)
+
+    @classmethod
+    def from_tree(cls, root: ParseNode) -> SourceMap:
+        """Indexes the elements of an expat parse tree (see
+        :py:mod:`xmllang.parser.expat`), which holds their positions"""
+
+        nodes = [root]
+        depths = [0]
+        # iterators over the children of the elements on the current path
+        stack = [iter(root.children)]
+        while stack:
+            for node in stack[-1]:
+                nodes.append(node)
+                depths.append(len(stack))
+                if node.children:
+                    stack.append(iter(node.children))
+                    break
+            else:
+                stack.pop()
+
+        tags = {}
+        setdefault = tags.setdefault
+        tag_ids = array("I", [setdefault(node.tag, len(tags)) for node in nodes])
+        return cls(
+            list(tags),
+            array("I", [node.lineno for node in nodes]),
+            array("I", [node.col_offset for node in nodes]),
+            array("I", depths),
+            tag_ids,
+        )
+
+    @classmethod
+    def build(cls, data: Buffer) -> SourceMap:
+        """Indexes the elements of an XMLLang document"""
+
+        tags = {}
+        lines, columns, depths, tag_ids = (array("I") for _ in range(4))
+        depth = 0
+
+        def start(tag, attrib):
+            nonlocal depth
+
+            lines.append(parser.CurrentLineNumber)
+            columns.append(parser.CurrentColumnNumber)
+            depths.append(depth)
+            tag_ids.append(tags.setdefault(tag, len(tags)))
+            depth += 1
+
+        def end(tag):
+            nonlocal depth
+
+            depth -= 1
+
+        parser = expat.ParserCreate()
+        parser.StartElementHandler = start
+        parser.EndElementHandler = end
+        for chunk in slices(data):
+            parser.Parse(chunk, False)
+        parser.Parse(b"", True)
+
+        return cls(list(tags), lines, columns, depths, tag_ids)
+
+    def lookup(self, lineno: int, col_offset: Optional[int] = None) -> Optional[str]:
+        """Returns the path of the element at given code location. Without
+        a column (e.g. a traceback's line number) the first element that
+        starts on the line is used."""
+
+        lines = self.lines
+        first = bisect_left(lines, lineno)
+        if col_offset is None:
+            index = first
+            if index == len(lines) or lines[index] != lineno:
+                index -= 1
+        else:
+            last = bisect_right(lines, lineno, first)
+            index = bisect_right(self.columns, col_offset, first, last) - 1
+
+        if index < 0:
+            return None
+        return self.path(index)
+
+    def path(self, index: int) -> str:
+        """Returns the path of the element at given index. The parent is
+        the closest preceding element one level up, elements in between
+        at the same depth and with the same tag are earlier siblings."""
+
+        depths, tag_ids = self.depths, self.tag_ids
+        parts = []
+        depth = depths[index]
+        while depth:
+            tag = tag_ids[index]
+            nth = 1
+            index -= 1
+            while depths[index] >= depth:
+                if depths[index] == depth and tag_ids[index] == tag:
+                    nth += 1
+                index -= 1
+
+            parts.append(f"{self.tags[tag]}[{nth}]")
+            depth -= 1
+
+        parts.append(self.tags[tag_ids[index]])
+        return "/" + "/".join(reversed(parts))
+
+    def dumps(self) -> bytes:
+        lines = self.lines
+        deltas = (line - previous for previous, line in zip([0, *lines], lines))
+        tags = "\n".join(self.tags).encode()
+
+        body = [len(lines).to_bytes(4, "little"), len(tags).to_bytes(4, "little"), tags]
+        for values in (deltas, self.columns, self.depths, self.tag_ids):
+            values = _pack(values)
+            body.append(values.typecode.encode())
+            body.append(values.tobytes())
+
+        return MAP_MAGIC + bytes((MAP_VERSION,)) + zlib.compress(b"".join(body))
+
+    @classmethod
+    def loads(cls, data: bytes) -> SourceMap:
+        if data[:4] != MAP_MAGIC:
+            raise ValueError("Not a source map")
+        if data[4] != MAP_VERSION:
+            raise ValueError(f"Unsupported source map version: {data[4]}")
+
+        body = memoryview(zlib.decompress(data[5:]))
+        count = int.from_bytes(body[:4], "little")
+        size = int.from_bytes(body[4:8], "little")
+        offset = 8 + size
+        tags = bytes(body[8:offset]).decode().split("\n") if size else []
+
+        arrays = []
+        for _ in range(4):
+            values = array(chr(body[offset]))
+            offset += 1
+            end = offset + count * values.itemsize
+            values.frombytes(body[offset:end])
+            offset = end
+
+            if sys.byteorder == "big":
+                values.byteswap()
+            arrays.append(values)
+
+        deltas, columns, depths, tag_ids = arrays
+        return cls(tags, array("I", accumulate(deltas)), columns, depths, tag_ids)
+
+    @classmethod
+    def load(cls, path: os.PathLike) -> SourceMap:
+        with open(os.fspath(path), "rb") as f:
+            return cls.loads(f.read())
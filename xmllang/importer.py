@@ -0,0 +1,96 @@
+"""Import hook for XMLLang modules
+
+After :py:func:`install`, ``import foo`` also looks for ``foo.xml``
+(and packages with an ``__init__.xml``) on ``sys.path``. Modules are
+loaded through :py:meth:`xmllang.compiler.Compiler.load`, so imports
+share the bytecode cache (``__pycache__/NAME.<tag>.xmlc``) of the
+compiler and of ``compile-all``, and later imports skip parsing when the
+source is unchanged.
+"""
+
+import sys
+import importlib.abc
+import importlib.machinery
+
+from xmllang.compiler import Compiler
+
+SOURCE_SUFFIXES = [".xml"]
+
+
+class XMLLangLoader(importlib.machinery.SourceFileLoader):
+    """Loads XMLLang modules. Code comes from :py:meth:`Compiler.load`
+    instead of the ``.pyc`` protocol of
+    :py:class:`importlib.machinery.SourceFileLoader`, so a file has a
+    single bytecode cache whoever compiled it.
+    """
+
+    def get_code(self, fullname):
+        return Compiler().load(self.get_filename(fullname))
+
+    def source_to_code(self, data, path, *, _optimize=-1):
+        return Compiler()._compile(data, path=path)
+
+
+class XMLLangFinder(importlib.abc.MetaPathFinder):
+    """Finds XMLLang modules on ``sys.path`` (or on the parent package's
+    ``__path__``). Directory listings are cached per path entry by
+    :py:class:`importlib.machinery.FileFinder`.
+    """
+
+    _finders = {}
+
+    @classmethod
+    def find_spec(cls, fullname, path=None, target=None):
+        for entry in sys.path if path is None else path:
+            finder = cls._get_finder(entry)
+            if finder is None:
+                continue
+
+            spec = finder.find_spec(fullname, target)
+            # namespace portions are left to the default PathFinder
+            if spec is not None and spec.loader is not None:
+                return spec
+
+        return None
+
+    @classmethod
+    def invalidate_caches(cls):
+        for finder in cls._finders.values():
+            finder.invalidate_caches()
+
+    @classmethod
+    def _get_finder(cls, entry):
+        if not isinstance(entry, str):
+            return None
+
+        try:
+            return cls._finders[entry]
+        except KeyError:
+            finder = importlib.machinery.FileFinder(
+                entry, (XMLLangLoader, SOURCE_SUFFIXES)
+            )
+            cls._finders[entry] = finder
+            return finder
+
+
+def install() -> None:
+    """Registers :py:class:`XMLLangFinder` on ``sys.meta_path``, right
+    before the default path based finder."""
+
+    if XMLLangFinder in sys.meta_path:
+        return
+
+    try:
+        index = sys.meta_path.index(importlib.machinery.PathFinder)
+    except ValueError:
+        index = len(sys.meta_path)
+
+    sys.meta_path.insert(index, XMLLangFinder)
+
+
+def uninstall() -> None:
+    """Removes :py:class:`XMLLangFinder` from ``sys.meta_path``"""
+
+    if XMLLangFinder in sys.meta_path:
+        sys.meta_path.remove(XMLLangFinder)
+        XMLLangFinder._finders.clear()
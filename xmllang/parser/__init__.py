@@ -4,6 +4,15 @@ Parses given XMLLang file and returns a ast.Module instance
 that contains a python AST.
 """
 
-from xmllang.parser.parser import Parser
-
 __all__ = ["Parser"]
+
+
+def __getattr__(name):
+    # Imported on first use, so loading a submodule (e.g. literals)
+    # doesn't load the whole parser
+    if name == "Parser":
+        from xmllang.parser.parser import Parser
+
+        return Parser
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
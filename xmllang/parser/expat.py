@@ -0,0 +1,253 @@
+"""Expat front end
+
+Builds the parse tree straight from ``xml.parsers.expat`` callbacks. Every
+:py:class:`Node` is both the element (``tag``, ``attrib``, ``text``,
+``tail``) and its parse tree node, so no ``ET.Element`` is created and
+the document is held in a single object graph. Nodes keep the position of
+their start tag, which the builder gives to the AST nodes it creates.
+"""
+
+from __future__ import annotations
+
+import os
+from types import MappingProxyType
+from xml.parsers import expat
+
+from xmllang.parser.parser import ParseNode
+from xmllang.parser.source import chunks
+from xmllang.parser.strings import InternTable
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import xml.etree.ElementTree as ET
+    from typing import Iterator, List, Mapping, Optional, Union
+    from xmllang.parser.source import Source
+
+_NO_ATTRIB = MappingProxyType({})
+
+
+class Node(ParseNode):
+    """Parse tree node that is its own element. Supports the part of the
+    ``ET.Element`` interface that the semantic rules use."""
+
+    __slots__ = ("tag", "attrib", "text", "tail", "lineno", "col_offset")
+
+    def __init__(
+        self,
+        tag: str,
+        attrib: Mapping[str, str] = _NO_ATTRIB,
+        parent: Optional[Node] = None,
+        lineno: int = 1,
+        col_offset: int = 0,
+    ) -> None:
+        self.tag = tag
+        self.attrib = attrib
+        self.text = None
+        self.tail = None
+        self.value = None
+        self.parent = parent
+        self.children = ()
+        self._meta = None
+        self.lineno = lineno
+        self.col_offset = col_offset
+
+    @property
+    def expr(self) -> Node:
+        return self
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        return self.attrib.get(key, default)
+
+    def __len__(self) -> int:
+        return len(self.children)
+
+    def __iter__(self) -> Iterator[Node]:
+        return iter(self.children)
+
+    def __getitem__(self, index):
+        return self.children[index]
+
+
+class Document:
+    """Holds the root :py:class:`Node`, stands in for ``ET.ElementTree``"""
+
+    def __init__(self, root: Node) -> None:
+        self.root = root
+
+    def getroot(self) -> Node:
+        return self.root
+
+
+def _create(
+    roots: List[Node],
+    lines: int = 0,
+    columns: int = 0,
+    closed: Optional[List[Node]] = None,
+    strings: Optional[InternTable] = None,
+) -> expat.XMLParserType:
+    """Returns an expat parser that builds a :py:class:`Node` tree and
+    appends its root to given list. Children of the root have no parent,
+    as with the parse tree of an ``ET.Element``. Names, attribute values
+    and texts are interned in strings (most texts are the same
+    indentation).
+
+    Positions are shifted by lines, and by columns on the first line, for
+    documents that are a slice of a larger one. If a closed list is given,
+    children of the root are moved there as soon as they end."""
+
+    if strings is None:
+        strings = InternTable()
+    setdefault = strings.strings.setdefault
+
+    stack = []
+    last = None
+    tail = False
+
+    def start(tag, attrib):
+        nonlocal last, tail
+
+        lineno = parser.CurrentLineNumber
+        col_offset = parser.CurrentColumnNumber
+        if lineno == 1:
+            col_offset += columns
+        lineno += lines
+
+        if attrib:
+            for key, value in attrib.items():
+                interned = setdefault(value, value)
+                if interned is not value:
+                    attrib[key] = interned
+                    strings.reused += 1
+
+        if stack:
+            parent = stack[-1]
+            node = Node(
+                tag,
+                attrib or _NO_ATTRIB,
+                parent if len(stack) > 1 else None,
+                lineno,
+                col_offset,
+            )
+            if parent.children:
+                parent.children.append(node)
+            else:
+                parent.children = [node]
+        else:
+            node = Node(tag, attrib or _NO_ATTRIB, None, lineno, col_offset)
+            roots.append(node)
+
+        stack.append(node)
+        last = node
+        tail = False
+
+    def end(tag):
+        nonlocal last, tail
+
+        last = stack.pop()
+        tail = True
+        if closed is not None and len(stack) == 1:
+            closed.append(stack[0].children.pop())
+
+    def data(text):
+        interned = setdefault(text, text)
+        if interned is not text:
+            text = interned
+            strings.reused += 1
+
+        if tail:
+            last.tail = text if last.tail is None else last.tail + text
+        else:
+            last.text = text if last.text is None else last.text + text
+
+    parser = expat.ParserCreate(intern=strings.strings)
+    parser.buffer_text = True
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = data
+    return parser
+
+
+def _error(error: expat.ExpatError) -> ET.ParseError:
+    import xml.etree.ElementTree as ET
+
+    exc = ET.ParseError(str(error))
+    exc.code = error.code
+    exc.position = error.lineno, error.offset
+    return exc
+
+
+def parse(source: Source, strings: Optional[InternTable] = None) -> Document:
+    """Parses an XMLLang document from a path, a buffer or a binary file
+    object, see :py:func:`xmllang.parser.source.chunks`."""
+
+    roots = []
+    parser = _create(roots, strings=strings)
+    try:
+        with chunks(source) as data:
+            for chunk in data:
+                parser.Parse(chunk, False)
+        parser.Parse(b"", True)
+    except expat.ExpatError as error:
+        raise _error(error) from None
+
+    return Document(roots[0])
+
+
+def iterparse(
+    source: Source, strings: Optional[InternTable] = None
+) -> Iterator[Node]:
+    """Yields the children of the root of a document (a path or a binary
+    file object) as soon as they are closed, without keeping them in the
+    tree. Files are read in small blocks.
+
+    strings is emptied whenever the consumer asks for the next child, so
+    it only holds the strings of the block being parsed (and of the
+    statement built from the last child) instead of every distinct
+    string of the document."""
+
+    if not hasattr(source, "read"):
+        with open(os.fspath(source), "rb") as file:
+            yield from iterparse(file, strings)
+        return
+
+    if strings is None:
+        strings = InternTable()
+
+    roots = []
+    closed = []
+    parser = _create(roots, closed=closed, strings=strings)
+    try:
+        with chunks(source) as data:
+            for chunk in data:
+                parser.Parse(chunk, False)
+                yield from _drain(closed, strings)
+        parser.Parse(b"", True)
+    except expat.ExpatError as error:
+        raise _error(error) from None
+
+    yield from _drain(closed, strings)
+
+
+def _drain(closed: List[Node], strings: InternTable) -> Iterator[Node]:
+    for node in closed:
+        yield node
+        strings.strings.clear()
+    closed.clear()
+
+
+def fromstring(
+    data: Union[str, bytes],
+    lines: int = 0,
+    columns: int = 0,
+    strings: Optional[InternTable] = None,
+) -> Node:
+    """Parses an XMLLang document from memory and returns its root, see
+    :py:func:`_create` for the position offsets."""
+
+    roots = []
+    try:
+        _create(roots, lines, columns, strings=strings).Parse(data, True)
+    except expat.ExpatError as error:
+        raise _error(error) from None
+
+    return roots[0]
@@ -0,0 +1,123 @@
+"""Literal classification for leaf elements
+
+Turns the text of a leaf element (``<e>15</e>``) into the python value
+it stands for: int, float, bool, None, Ellipsis or str. Keywords are
+resolved with a single dict lookup and numbers with one precompiled
+scanner, anything else is a string.
+"""
+
+from __future__ import annotations
+
+import ast
+import re
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Dict, Iterable, List
+
+KEYWORDS = {"True": True, "False": False, "None": None, "...": ...}
+NUMBER = re.compile(r"(?P<int>[+-]?[0-9]+)|(?P<float>[+-]?[0-9]*\.[0-9]+)")
+NUMBER_START = frozenset("+-.0123456789")
+
+NODES = {
+    int: ast.Num,
+    float: ast.Num,
+    bool: ast.NameConstant,
+    type(None): ast.NameConstant,
+    type(...): lambda value: ast.Ellipsis(),
+    str: ast.Str,
+}
+
+CASTS = {"str": ast.Str, "bytes": ast.Bytes}
+
+TRUE = frozenset(("y", "yes", "t", "true", "on", "1"))
+FALSE = frozenset(("n", "no", "f", "false", "off", "0"))
+
+_missing = object()
+_fullmatch = NUMBER.fullmatch
+
+
+def classify(text: str) -> Any:
+    """Returns python value of given (stripped) leaf text"""
+
+    value = KEYWORDS.get(text, _missing)
+    if value is not _missing:
+        return value
+
+    if text and text[0] in NUMBER_START:
+        match = _fullmatch(text)
+        if match is not None:
+            if match.lastgroup == "int":
+                return int(text)
+            else:
+                return float(text)
+
+    return text
+
+
+def classify_many(texts: Iterable[str]) -> List[Any]:
+    """Classifies a batch of leaf texts, every distinct text is
+    classified only once and repeated texts share the same value."""
+
+    memo = {}
+    values = []
+    for text in texts:
+        try:
+            value = memo[text]
+        except KeyError:
+            value = memo[text] = classify(text)
+        values.append(value)
+
+    return values
+
+
+def classify_leaves(root) -> Dict[Any, Any]:
+    """Classifies text of every leaf ``<e>`` element under given root (an
+    ``ET.Element`` or an expat node) in one batch and returns an element
+    to value mapping, in document order. This is a standalone helper, the
+    builder classifies every leaf as it evaluates it."""
+
+    leaves = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if len(node) != 0:
+            stack.extend(reversed(list(node)))
+        elif node.tag == "e" and "cast" not in node.attrib and node.text is not None:
+            leaves.append(node)
+
+    values = classify_many(node.text.strip() for node in leaves)
+
+    return dict(zip(leaves, values))
+
+
+def to_ast(value: Any) -> ast.AST:
+    """Returns AST literal node of a value returned by :py:func:`classify`"""
+
+    return NODES[type(value)](value)
+
+
+def cast(text: str, kind: str, encoding: str = "utf-8") -> ast.AST:
+    """Returns AST node of an explicitly casted leaf (``<e cast="str">``)"""
+
+    if kind == "bytes":
+        text = bytes(text, encoding)
+
+    node = CASTS.get(kind) or getattr(ast, kind.title(), None)
+    if node is None:
+        raise SyntaxError(f"Couldn't cast to {kind}")
+
+    return node(text)
+
+
+def strtobool(value: str) -> bool:
+    """Parses a boolean flag attribute (``call="True"``) the way
+    ``distutils.util.strtobool`` did, raises ValueError on anything else."""
+
+    lowered = value.lower()
+    if lowered in TRUE:
+        return True
+    elif lowered in FALSE:
+        return False
+
+    raise ValueError(f"invalid truth value {value!r}")
@@ -0,0 +1,153 @@
+"""Constant folding for literal containers
+
+Tuples whose elements are all literals become a single constant. Large
+lists, sets and dicts (at least :py:data:`FOLD_THRESHOLD` elements)
+have their runs of literal elements folded into tuple constants of at
+most :py:data:`CHUNK_SIZE` elements which are unpacked back into the
+container (``[*(1, 2, ...), x, *(...)]`` and ``{**{k: v for k, v in
+(...)}}``), so the bytecode stays a handful of instructions per chunk
+instead of one per element.
+"""
+
+from __future__ import annotations
+
+import ast
+import operator
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, List
+
+FOLD_THRESHOLD = 256
+CHUNK_SIZE = 4096
+
+GETTERS = {
+    ast.Constant: operator.attrgetter("value"),
+    ast.Num: operator.attrgetter("n"),
+    ast.Str: operator.attrgetter("s"),
+    ast.Bytes: operator.attrgetter("s"),
+    ast.NameConstant: operator.attrgetter("value"),
+    ast.Ellipsis: lambda node: ...,
+}
+
+_missing = object()
+
+
+def literal_value(node: ast.AST) -> Any:
+    """Returns python value of a literal node, or a sentinel"""
+
+    getter = GETTERS.get(type(node))
+    if getter is None:
+        return _missing
+    return getter(node)
+
+
+def is_literal(node: ast.AST) -> bool:
+    return type(node) in GETTERS
+
+
+def fold(node: ast.AST) -> ast.AST:
+    """Returns folded version of a container node (or the node itself)"""
+
+    folder = FOLDERS.get(type(node))
+    if folder is None:
+        return node
+    return folder(node)
+
+
+def fold_tuple(node: ast.Tuple) -> ast.AST:
+    if not isinstance(node.ctx, ast.Load):
+        return node
+
+    values = []
+    for elt in node.elts:
+        value = literal_value(elt)
+        if value is _missing:
+            return node
+        values.append(value)
+
+    return ast.Constant(tuple(values))
+
+
+def fold_list(node: ast.List) -> ast.List:
+    if isinstance(node.ctx, ast.Load) and len(node.elts) >= FOLD_THRESHOLD:
+        node.elts = _fold_runs(node.elts)
+    return node
+
+
+def fold_set(node: ast.Set) -> ast.Set:
+    if len(node.elts) >= FOLD_THRESHOLD:
+        node.elts = _fold_runs(node.elts)
+    return node
+
+
+def fold_dict(node: ast.Dict) -> ast.AST:
+    if len(node.keys) < FOLD_THRESHOLD:
+        return node
+
+    keys = []
+    values = []
+    run = []
+
+    def flush():
+        for start in range(0, len(run), CHUNK_SIZE):
+            keys.append(None)
+            values.append(_dictcomp(tuple(run[start : start + CHUNK_SIZE])))
+        run.clear()
+
+    for key, value in zip(node.keys, node.values):
+        literal_key = literal_value(key) if key is not None else _missing
+        literal = literal_value(value)
+        if literal_key is not _missing and literal is not _missing:
+            run.append((literal_key, literal))
+        else:
+            flush()
+            keys.append(key)
+            values.append(value)
+    flush()
+
+    node.keys = keys
+    node.values = values
+    return node
+
+
+def _fold_runs(elts: List[ast.AST]) -> List[ast.AST]:
+    folded = []
+    run = []
+
+    def flush():
+        for start in range(0, len(run), CHUNK_SIZE):
+            chunk = ast.Constant(tuple(run[start : start + CHUNK_SIZE]))
+            folded.append(ast.Starred(chunk, ast.Load()))
+        run.clear()
+
+    for elt in elts:
+        value = literal_value(elt)
+        if value is _missing:
+            flush()
+            folded.append(elt)
+        else:
+            run.append(value)
+    flush()
+
+    return folded
+
+
+def _dictcomp(pairs: tuple) -> ast.DictComp:
+    """``{k: v for k, v in pairs}``"""
+
+    target = ast.Tuple(
+        [ast.Name("k", ast.Store()), ast.Name("v", ast.Store())], ast.Store()
+    )
+    generator = ast.comprehension(target, ast.Constant(pairs), [], 0)
+    return ast.DictComp(
+        ast.Name("k", ast.Load()), ast.Name("v", ast.Load()), [generator]
+    )
+
+
+FOLDERS = {
+    ast.Tuple: fold_tuple,
+    ast.List: fold_list,
+    ast.Set: fold_set,
+    ast.Dict: fold_dict,
+}
@@ -2,16 +2,39 @@ from __future__ import annotations
 
 import ast
 import os
-import xml.etree.ElementTree as ET
+import threading
+import time
 
-from collections import defaultdict, OrderedDict
-from copy import deepcopy
-from dataclasses import dataclass, field
-from typing import Dict, List, Sequence, Optional
-from pprint import pprint
+from contextlib import nullcontext
 from reprlib import recursive_repr
 
-from xmllang.parser.semantics import SemanticMap, get_decl
+from xmllang.parser.optimizer import FOLDERS, fold
+from xmllang.parser.semantics import (
+    IMMUTABLE_LITERAL_RULES,
+    SemanticMap,
+    get_decl,
+    get_handler,
+)
+from xmllang.parser.source import parse_etree
+from xmllang.parser.strings import InternTable
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import xml.etree.ElementTree as ET
+    from typing import (
+        AbstractSet,
+        Any,
+        Callable,
+        Dict,
+        IO,
+        Iterator,
+        List,
+        Sequence,
+        Optional,
+        Tuple,
+        Union,
+    )
+    from xmllang.profiler import Profiler
 
 
 AST_CONS_MAP = (
@@ -27,19 +50,92 @@ AST_CONS_MAP = (
 )
 
 
-@dataclass(unsafe_hash=True)
-class XMLExpr:
-    expr: ET.Element
-    value: Optional[ast.AST] = None
-
-    parent: Optional[XMLExpr] = None
-    children: Optional[Sequence[XMLExpr]] = field(default_factory=list, hash=False)
-
-    meta: Optional[Dict] = field(default_factory=dict, hash=False)
+# values with no child nodes that carry a position, and their string field
+LEAVES = {
+    ast.Num: None,
+    ast.Str: "s",
+    ast.Bytes: None,
+    ast.NameConstant: None,
+    ast.Constant: None,
+    ast.Name: "id",
+}
+# fields that never hold a node that carries a position
+SCALAR_FIELDS = frozenset({"n", "ctx", "level", "simple"})
+STRING_FIELDS = frozenset({"s", "id", "arg", "attr", "name", "module"})
+
+
+def locate(
+    value: ast.AST, lineno: int, col_offset: int, intern: Callable[[str], str]
+) -> None:
+    """Sets the position of a freshly built value (a node or a tuple of
+    nodes) and of the nodes created along with it, and interns their
+    strings. Nodes that already have a position are the values of child
+    elements, they are not entered, so every node of a module is visited
+    once."""
+
+    if type(value) is tuple:
+        stack = [item for item in value if isinstance(item, ast.AST)]
+    elif isinstance(value, ast.AST):
+        stack = [value]
+    else:
+        return
+
+    while stack:
+        node = stack.pop()
+        attrs = node.__dict__
+        if "lineno" in node._attributes:
+            if "lineno" in attrs:
+                continue
+            attrs["lineno"] = lineno
+            attrs["col_offset"] = col_offset
+
+        for field in node._fields:
+            if field in SCALAR_FIELDS:
+                continue
+
+            child = attrs.get(field)
+            if field in STRING_FIELDS:
+                if type(child) is str:
+                    attrs[field] = intern(child)
+            elif isinstance(child, ast.AST):
+                stack.append(child)
+            elif type(child) is list:
+                for item in child:
+                    if isinstance(item, ast.AST):
+                        stack.append(item)
+
+
+class ParseNode:
+    """Parse tree node, holds the value built for its element. Nodes hash
+    and compare by identity, leaves share an empty ``children`` tuple and
+    ``meta`` is only allocated when it is first accessed. Subclasses give
+    the element as ``expr``."""
+
+    __slots__ = ("value", "parent", "children", "_meta")
+
+    lineno = 1
+    col_offset = 0
+
+    @property
+    def meta(self) -> Dict:
+        meta = self._meta
+        if meta is None:
+            meta = self._meta = {}
+        return meta
+
+    @meta.setter
+    def meta(self, value: Dict) -> None:
+        self._meta = value
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        """Reads a meta entry without allocating :py:attr:`meta`"""
+
+        meta = self._meta
+        return meta.get(key, default) if meta else default
 
     @recursive_repr()
     def __repr__(self):
-        if self.parent:
+        if self.parent is not None:
             qualname = f"{self.parent!r}.{self.expr.tag}"
         else:
             qualname = self.expr.tag
@@ -49,96 +145,463 @@ class XMLExpr:
         return repr(self)
 
 
+class XMLExpr(ParseNode):
+    """Parse tree node that wraps an XML element. Source positions are
+    only known for nodes of the expat backend, the others are placed at
+    the start of the document."""
+
+    __slots__ = ("expr",)
+
+    def __init__(
+        self,
+        expr: ET.Element,
+        value: Optional[ast.AST] = None,
+        parent: Optional[ParseNode] = None,
+        children: Sequence[ParseNode] = (),
+        meta: Optional[Dict] = None,
+    ) -> None:
+        self.expr = expr
+        self.value = value
+        self.parent = parent
+        self.children = children
+        self._meta = meta
+
+
+class NodeExpr(XMLExpr):
+    """Parse tree node of a build of its own for a node of the expat
+    backend (see :py:class:`xmllang.parser.expat.Node`), which keeps the
+    position of the node."""
+
+    __slots__ = ("lineno", "col_offset")
+
+    def __init__(
+        self,
+        expr: ParseNode,
+        value: Optional[ast.AST] = None,
+        parent: Optional[ParseNode] = None,
+    ) -> None:
+        self.expr = expr
+        self.value = value
+        self.parent = parent
+        self.children = ()
+        self._meta = None
+        self.lineno = expr.lineno
+        self.col_offset = expr.col_offset
+
+
+class BuildState:
+    """Mutable state of a single build. Shareable subtrees are numbered
+    in ``structures`` and the values built for them are kept in
+    ``literals``. Passing the same state to several calls shares literals
+    between them, a state must not be used by two calls at once."""
+
+    __slots__ = ("structures", "literals")
+
+    def __init__(self) -> None:
+        self.structures = {}
+        self.literals = {}
+
+
 class Parser:
     """Parses XML files and converts them into Python AST 
-    with XMLLang standards."""
-
-    def __init__(self, xml: ET.ElementTree) -> None:
+    with XMLLang standards. Strings of the parse tree and of the built
+    AST are interned in :py:attr:`strings`.
+
+    Equal subtrees of the semantic rules in share (immutable literals by
+    default, ``semantics.LITERAL_RULES`` adds lists, sets and dicts) are
+    built once per build and their value is reused for every copy, in
+    the position of the first one.
+
+    Every call to :py:meth:`parse` keeps its state in its own
+    :py:class:`BuildState`. Nodes of the expat backend are their own parse
+    tree nodes, a build stores its values in them, so only one build at a
+    time uses the tree itself and the ones that find it in use build on
+    :py:class:`NodeExpr` copies of their own. One parser can be used from
+    several threads at once, the tracer is the exception, it collects the
+    stats of one parse at a time."""
+
+    def __init__(
+        self,
+        xml: ET.ElementTree,
+        tracer: Optional[Profiler] = None,
+        optimize: bool = True,
+        strings: Optional[InternTable] = None,
+        share: AbstractSet[type] = IMMUTABLE_LITERAL_RULES,
+    ) -> None:
         self.xml = xml
         self.root = self.xml.getroot()
-        self.tracer = 0
+        self.tracer = tracer
+        self.optimize = optimize
+        self.strings = strings if strings is not None else InternTable()
+        self.share = share
+        # tag -> whether its rule is in share, filling it from several
+        # threads at once only ever stores the same values
+        self._shareable = {}
+        # held by the build that stores its values in the expat tree
+        self._tree = threading.Lock()
+
+        if tracer is not None:
+            self.xmleval = self._traced_xmleval
+            tracer.strings = self.strings
 
     @classmethod
-    def fromfile(cls, file_name: os.PathLike) -> Parser:
+    def fromfile(
+        cls,
+        file_name: os.PathLike,
+        tracer: Optional[Profiler] = None,
+        backend: str = "etree",
+    ) -> Parser:
         """Creates an :py:class:`Parser` instance from a file
-        instead of an already existing XML object.
+        instead of an already existing XML object. The file is memory
+        mapped and fed to the backend in slices. The ``etree`` backend
+        goes through an ``ET.ElementTree``, built by its C parser. The
+        ``expat`` backend builds the parse tree from python callbacks,
+        slower but it knows the source position of every element, which
+        code locations (and so tracebacks) need.
         """
-        xml = ET.parse(os.fspath(file_name))
-        return cls(xml)
+        return cls._load(os.fspath(file_name), tracer, backend, "fromfile")
 
-    def parse(self, root: Optional[ET.Element] = None) -> ast.Module:
-        """Runs through instance's root (xml's root) attribute.
-        Tracks contexts and returns result of :py:func:`build_module`
+    @classmethod
+    def frombuffer(
+        cls,
+        buffer: Union[bytes, bytearray, memoryview, IO[bytes]],
+        tracer: Optional[Profiler] = None,
+        backend: str = "etree",
+    ) -> Parser:
+        """Creates an :py:class:`Parser` instance from an in memory
+        document (any bytes-like object, e.g. an ``mmap``) or a binary
+        file object, see :py:meth:`fromfile`.
         """
+        if isinstance(buffer, (str, os.PathLike)):
+            raise TypeError(
+                "frombuffer() takes a bytes-like or file object, "
+                "use fromfile() for paths"
+            )
+        return cls._load(buffer, tracer, backend, "frombuffer")
 
-        root = root or self.root
-        points = self._parse(root, defaultdict(dict), 0)
-        points = OrderedDict(reversed(list(points.items())))
+    @classmethod
+    def fromstring(
+        cls,
+        text: Union[str, bytes],
+        tracer: Optional[Profiler] = None,
+        backend: str = "etree",
+    ) -> Parser:
+        """Creates an :py:class:`Parser` instance from a document held in
+        a string (or in bytes), see :py:meth:`fromfile`."""
+
+        strings = InternTable()
+        with tracer.phase("fromstring") if tracer is not None else nullcontext():
+            if backend == "expat":
+                from xmllang.parser import expat
+
+                xml = expat.Document(expat.fromstring(text, strings=strings))
+            elif backend == "etree":
+                import xml.etree.ElementTree as ET
+
+                xml = ET.ElementTree(ET.fromstring(text))
+            else:
+                raise ValueError(f"Unknown backend: {backend!r}")
+        return cls(xml, tracer, strings=strings)
 
-        return self.build_module(points)
+    @classmethod
+    def frombytes(
+        cls,
+        data: Union[bytes, bytearray, memoryview],
+        tracer: Optional[Profiler] = None,
+        backend: str = "etree",
+    ) -> Parser:
+        """Creates an :py:class:`Parser` instance from a document held in
+        a bytes-like object, see :py:meth:`fromfile`."""
+
+        if isinstance(data, (str, os.PathLike)) or hasattr(data, "read"):
+            raise TypeError(
+                "frombytes() takes a bytes-like object, use fromstring() for "
+                "strings, fromfile() for paths and frombuffer() for files"
+            )
+        return cls._load(data, tracer, backend, "frombytes")
 
-    def build_module(self, points: Dict[int, Sequence[XMLExpr]]) -> ast.Module:
-        """Builds an ast.Module instance with given parse tree"""
+    @classmethod
+    def _load(cls, source, tracer, backend, phase):
+        strings = InternTable()
+        with tracer.phase(phase) if tracer is not None else nullcontext():
+            if backend == "expat":
+                from xmllang.parser import expat
+
+                xml = expat.parse(source, strings)
+            elif backend == "etree":
+                xml = parse_etree(source)
+            else:
+                raise ValueError(f"Unknown backend: {backend!r}")
+        return cls(xml, tracer, strings=strings)
 
-        xmlast = deepcopy(points)
+    @classmethod
+    def iterparse(cls, source: Union[os.PathLike, IO[bytes]]) -> Iterator[ast.stmt]:
+        """Streams top-level statements from a file (path or file object)
+        without loading the whole document. Every child of the root is
+        built as soon as it is closed and then dropped from the tree.
+        Each one is built with its own :py:class:`BuildState`, so literals
+        are only shared within a statement and memory use doesn't grow
+        with the document.
+        """
 
-        for level, point in points.items():
-            xmlast[level] = []
+        from xmllang.parser import expat
+
+        parser = cls(expat.Document(expat.Node("xmllang")))
+        for node in expat.iterparse(source, parser.strings):
+            yield parser.build_statement(node)
+
+    def build_statement(
+        self, node: ET.Element, state: Optional[BuildState] = None
+    ) -> ast.stmt:
+        """Builds the statement of a single child of the root, pass the
+        state of the other statements of the module to share literals
+        with them."""
+
+        if not isinstance(node, ParseNode):
+            expr = XMLExpr(node)
+            expr.children = self._parse(node, expr)
+        elif self._tree.acquire(False):
+            try:
+                return self._build_stmt(node, state)
+            finally:
+                self._tree.release()
+        else:
+            expr = NodeExpr(node)
+            expr.children = self._parse(node, expr, in_place=False)
 
-            for encap, exprs in point.items():
+        return self._build_stmt(expr, state)
 
-                for expr in exprs:
-                    expr.value = self.xmleval(expr)
+    def parse(
+        self, root: Optional[ET.Element] = None, state: Optional[BuildState] = None
+    ) -> ast.Module:
+        """Runs through instance's root (xml's root) attribute.
+        Builds the expression tree and returns result of :py:func:`build_module`
+        """
 
-                encap.value = self.xmleval(encap)
-                xmlast[level].append(encap)
+        if root is None:
+            root = self.root
+        in_place = isinstance(root, ParseNode) and self._tree.acquire(False)
+        try:
+            with self._phase("_parse"):
+                exprs = self._parse(root, in_place=in_place)
+
+            with self._phase("build_module"):
+                return self.build_module(exprs, state)
+        finally:
+            if in_place:
+                self._tree.release()
+
+    def build_module(
+        self, exprs: Sequence[XMLExpr], state: Optional[BuildState] = None
+    ) -> ast.Module:
+        """Builds an ast.Module instance with given parse tree"""
 
-        content = []
-        for expr in xmlast[0]:
-            if isinstance(expr.value, AST_CONS_MAP):
-                content.append(expr.value)
-            else:
-                content.append(ast.Expr(expr.value))
+        if state is None:
+            state = BuildState()
+        return ast.Module([self._build_stmt(expr, state) for expr in exprs])
 
-        module = ast.Module(content)
-        ast.fix_missing_locations(module)
+    def _build_stmt(
+        self, expr: XMLExpr, state: Optional[BuildState] = None
+    ) -> ast.stmt:
+        self._build(expr, state if state is not None else BuildState())
 
-        return module
+        if isinstance(expr.value, AST_CONS_MAP):
+            return expr.value
+        else:
+            stmt = ast.Expr(expr.value)
+            stmt.lineno = expr.lineno
+            stmt.col_offset = expr.col_offset
+            return stmt
+
+    def _build(self, expr: XMLExpr, state: BuildState) -> None:
+        """Evaluates given expression bottom-up, children are evaluated
+        (and their values stored in place) before their parent. Nodes are
+        collected with an explicit stack, so nesting depth is not bound
+        by the interpreter's recursion limit. Every value is placed at the
+        position of its element as soon as it is built."""
+
+        xmleval = self.xmleval
+        optimize = self.optimize
+        intern = self.strings.intern
+
+        nodes = [expr]
+        pending = [expr]
+        while pending:
+            for child in pending.pop().children:
+                nodes.append(child)
+                if child.children:
+                    pending.append(child)
+
+        if self.share:
+            order, first, copies = self._plan(nodes, state)
+        else:
+            order, first, copies = reversed(nodes), (), ()
+
+        for node in order:
+            if copies and node in copies:
+                node.value = copies[node].value
+                continue
+
+            value = xmleval(node)
+            if optimize and type(value) in FOLDERS:
+                value = fold(value)
+
+            kind = type(value)
+            if kind in LEAVES:
+                # a leaf with a position is the value of a child element
+                # (e.g. of ``<e>``), maybe shared with earlier statements
+                attrs = value.__dict__
+                if "lineno" not in attrs:
+                    attrs["lineno"] = node.lineno
+                    attrs["col_offset"] = node.col_offset
+
+                    field = LEAVES[kind]
+                    if field is not None and type(attrs[field]) is str:
+                        attrs[field] = intern(attrs[field])
+            else:
+                locate(value, node.lineno, node.col_offset, intern)
+
+            node.value = value
+
+        literals = state.literals
+        for structure, node in first:
+            literals[structure] = node.value
+
+    def _plan(
+        self, nodes: List[XMLExpr], state: BuildState
+    ) -> Tuple[List[XMLExpr], List[Tuple[int, XMLExpr]], Dict[XMLExpr, XMLExpr]]:
+        """Numbers the shareable subtrees of nodes by structure (equal
+        subtrees get the same number) and returns the nodes to evaluate,
+        the first copy of every new structure and a mapping of the other
+        copies to their first one. Only containers are numbered, leaves
+        are part of their parent's structure.
+
+        When a structure repeats, nodes are evaluated in post-order and
+        the subtrees of copies are left out, a copy takes the value of
+        its first one, which is always evaluated before it."""
+
+        share = self.share
+        shareable = self._shareable
+        structures = state.structures
+        literals = state.literals
+
+        ids = {}
+        repeated = False
+        for node in reversed(nodes):
+            if not node.children:
+                continue
+
+            element = node.expr
+            tag = element.tag
+            allowed = shareable.get(tag)
+            if allowed is None:
+                allowed = shareable[tag] = get_decl(tag) in share
+
+            attrib = element.attrib
+            if not allowed or "f" in attrib:
+                continue
+
+            keys = [tag, tuple(attrib.items()) if attrib else ()]
+            for child in node.children:
+                if child.children:
+                    key = ids.get(child)
+                    if key is None:
+                        break
+                    keys.append(key)
+                else:
+                    leaf = child.expr
+                    tag = leaf.tag
+                    allowed = shareable.get(tag)
+                    if allowed is None:
+                        allowed = shareable[tag] = get_decl(tag) in share
+                    if not allowed:
+                        break
+
+                    attrib = leaf.attrib
+                    keys.append(tag)
+                    keys.append(tuple(attrib.items()) if attrib else ())
+                    keys.append(leaf.text)
+            else:
+                count = len(structures)
+                structure = structures.setdefault(tuple(keys), count)
+                if structure != count or structure in literals:
+                    repeated = True
+                ids[node] = structure
+
+        if not repeated:
+            return reversed(nodes), [(ids[node], node) for node in ids], ()
+
+        order = []
+        seen = {}
+        copies = {}
+        pending = [(nodes[0], False)]
+        while pending:
+            node, expanded = pending.pop()
+            if expanded:
+                order.append(node)
+                continue
+
+            structure = ids.get(node)
+            if structure is not None:
+                if structure in literals:
+                    node.value = literals[structure]
+                    continue
+                elif structure in seen:
+                    copies[node] = seen[structure]
+                    order.append(node)
+                    continue
+                seen[structure] = node
+
+            pending.append((node, True))
+            pending.extend((child, False) for child in reversed(node.children))
+
+        return order, list(seen.items()), copies
 
     def _parse(
         self,
         root: ET.Element,
-        ctx: Dict,
-        level: int = 0,
         bind_to: Optional[XMLExpr] = None,
-    ) -> Dict:
-        for node in root:
-            expr = XMLExpr(node, bind_to)
+        in_place: bool = True,
+    ) -> List[XMLExpr]:
+        """Returns the parse tree nodes of the children of root. Nodes of
+        the expat backend are used as they are unless in_place is false,
+        then (as elements) they get a :py:class:`NodeExpr` each."""
 
-            if bind_to is not None:
-                bind_to.children.append(expr)
+        wrap = XMLExpr
+        if isinstance(root, ParseNode):
+            if in_place:
+                return list(root.children)
+            wrap = NodeExpr
 
-            if len(node) == 0:
-                if bind_to:
-                    ptr = ctx[level - 1][bind_to]
+        exprs = []
+        stack = [(root, bind_to, exprs)]
 
-                    if not isinstance(ptr, list):
-                        ptr = [ptr]
+        while stack:
+            root, bind_to, siblings = stack.pop()
+            for node in root:
+                expr = wrap(node, None, bind_to)
+                siblings.append(expr)
 
-                    ptr.append(expr)
+                if len(node) != 0:
+                    expr.children = []
+                    stack.append((node, expr, expr.children))
 
-                else:
-                    ctx[level][expr] = [expr]
-            else:
-                ctx[level][expr] = []
-                ctx = self._parse(node, ctx, level + 1, expr)
-        else:
-            return ctx
+        return exprs
 
     def xmleval(self, expr: XMLExpr) -> ast.AST:
-        decl = get_decl(expr.expr.tag)(expr)
-        ast = decl.make()
-        return ast
+        return get_handler(expr.expr.tag)(expr)
+
+    def _traced_xmleval(self, expr: XMLExpr) -> ast.AST:
+        tag = expr.expr.tag
+        start = time.perf_counter()
+        value = get_handler(tag)(expr)
+        self.tracer.count(tag, time.perf_counter() - start)
+        return value
+
+    def _phase(self, name: str):
+        if self.tracer is None:
+            return nullcontext()
+        return self.tracer.phase(name)
 
     def __str__(self):
         return f"{self.file_path} parser"
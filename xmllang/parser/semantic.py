@@ -1,10 +1,13 @@
-from inspect import signature as sgn
+from __future__ import annotations
+
 from ast import AST
 from abc import ABC, abstractmethod
-from typing import Union, Tuple, Optional, Any, Pattern
-from dataclasses import dataclass
 from enum import Enum, auto
 
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Union, Tuple, Optional, Any
+
 
 class SemanticMod(Enum):
     """Type of semantic declaration.
@@ -36,11 +39,28 @@ class ModUnion:
 SemanticModUnion = ModUnion()
 
 
-@dataclass
 class SemanticType:
-    name: str
-    mod: Union[SemanticMod, Tuple[SemanticMod, ...]]
-    meta: Optional[Any] = None
+    __slots__ = ("name", "mod", "meta")
+
+    def __init__(
+        self,
+        name: str,
+        mod: Union[SemanticMod, Tuple[SemanticMod, ...]],
+        meta: Optional[Any] = None,
+    ) -> None:
+        self.name = name
+        self.mod = mod
+        self.meta = meta
+
+    def __repr__(self):
+        return f"SemanticType(name={self.name!r}, mod={self.mod!r}, meta={self.meta!r})"
+
+    def __eq__(self, other):
+        if type(other) is not SemanticType:
+            return NotImplemented
+        return (self.name, self.mod, self.meta) == (other.name, other.mod, other.meta)
+
+    __hash__ = None
 
 
 class SemanticRule(ABC):
@@ -51,6 +71,8 @@ class SemanticRule(ABC):
 
 
 def gendoc(klass):
+    from inspect import signature as sgn
+
     if hasattr(klass, "make"):
         make = getattr(klass, "make")
         signature = sgn(make)
@@ -1,29 +1,34 @@
+from __future__ import annotations
+
 import ast
-import re
 import operator
 
-from typing import Union, NewType, Sequence, Tuple, List
 from itertools import chain
 from functools import partial
-from distutils.util import strtobool
 from xmllang.parser.semantic import *
+from xmllang.parser.literals import cast, classify, strtobool, to_ast
 
-c = re.compile
-
-Patterns = (c(r"True|False|None"), c(r"^(?=.)([+-]?([0-9]*)(\.([0-9]+))?)$"), r"\.\.\.")
 Literals = (ast.NameConstant, ast.Num, ast.Ellipsis)
-AstMap = tuple(zip(Patterns, Literals))
 
-AnyAst = NewType("Any AST Object", ast.AST)
-LiteralType = NewType("AST Literal", Union[Literals])
-SequenceType = NewType("AST Sequence", Union[ast.List, ast.Tuple, ast.Set])
-MappingType = NewType("AST Mapping", ast.Dict)
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Union, NewType, Sequence, Tuple, List
+
+    AnyAst = NewType("Any AST Object", ast.AST)
+    LiteralType = NewType("AST Literal", Union[Literals])
+    SequenceType = NewType("AST Sequence", Union[ast.List, ast.Tuple, ast.Set])
+    MappingType = NewType("AST Mapping", ast.Dict)
 
 
 @SemanticRule.register
 class Expr:
     """Expression declaration, everything counts as an expression
     in XMLLang standards.
+
+    Declarations implement their semantics in :py:meth:`build`, a
+    stateless function of the parse tree node, and :py:meth:`make`
+    forwards to it. Rules that only override :py:meth:`make` keep
+    working, :py:func:`get_handler` instantiates them per node.
     """
 
     _type = SemanticType("Expression", SemanticMod.EXPR)
@@ -32,7 +37,11 @@ class Expr:
         self.expr = expr
         self.element = expr.expr
 
-    def make(self) -> None:
+    def make(self) -> AnyAst:
+        return self.build(self.expr)
+
+    @staticmethod
+    def build(expr) -> None:
         pass
 
     def pattern(self) -> None:
@@ -45,61 +54,31 @@ class Element(Expr):
 
     _type = SemanticType("Element", SemanticMod.TEXT_ATTR)
 
-    def make(self) -> AnyAst:
-        if len(self.element) != 0:
-            if strtobool(self.element.attrib.get("f", "false")):
-                return FString(self.expr)
-                # raise NotImplementedError("FStrings are not implemented")
-            elif len(self.expr.children) == 1:
-                ex = self.expr.children[0]
-                return get_decl(ex.expr.tag)(ex).make()
+    @staticmethod
+    def build(expr) -> AnyAst:
+        element = expr.expr
+
+        if len(element) != 0:
+            if strtobool(element.attrib.get("f", "false")):
+                return FString.build(expr)
+            elif len(expr.children) == 1:
+                return expr.children[0].value
             else:
                 raise SyntaxError("Unkown behaivor")
 
-        casts = self.element.attrib.get("cast")
-        value = self.element.text.strip()
+        casts = element.attrib.get("cast")
+        value = element.text.strip()
 
         if casts:
-            if casts == "bytes":
-                value = bytes(value, self.element.attrib.get("encoding", "utf-8"))
+            return cast(value, casts, element.attrib.get("encoding", "utf-8"))
 
-            if hasattr(ast, casts.title()):
-                return getattr(ast, casts.title())(value)
-            else:
-                raise SyntaxError(f"Couldn't cast to {casts}")
-
-        for pattern, literal in AstMap:
-            match = re.match(pattern, value)
-            if match:
-                val = self.typecast(match, literal)
-                if val:
-                    return literal(val)
-                else:
-                    return literal()
-        else:
-            return ast.Str(value)
-
-    @staticmethod
-    def typecast(match, literal):
-        if literal is ast.NameConstant:
-            m = match.group(0)
-            if m in {"True", "False"}:
-                return strtobool(m)
-            else:
-                return None
-        elif literal is ast.Num:
-            m = match.group(0)
-            if "." in m:
-                return float(m)
-            else:
-                return int(m)
-        else:
-            return None
+        return to_ast(classify(value))
 
 
 class FString(Expr):
-    def make(self) -> ast.JoinedStr:
-        text = self.element.text
+    @staticmethod
+    def build(expr) -> ast.JoinedStr:
+        text = expr.expr.text
 
         if isinstance(text, str):
             text = text.strip()
@@ -107,10 +86,10 @@ class FString(Expr):
         base = [ast.Str(text)] if text else []
         children = map(
             partial(ast.FormattedValue, conversion=-1, format_spec=None),
-            map(operator.attrgetter("value"), self.expr.children),
+            map(operator.attrgetter("value"), expr.children),
         )
         texts = map(
-            ast.Str, map(str.strip, map(operator.attrgetter("tail"), self.element))
+            ast.Str, map(str.strip, map(operator.attrgetter("tail"), expr.expr))
         )
         base.extend(chain.from_iterable(zip(children, texts)))
 
@@ -121,18 +100,21 @@ class Sequence(Expr):
 
     _type = SemanticType("NaRT", SemanticMod.SUB_ELM_ATTR)  # Not a Real Type
 
-    def make(self) -> SequenceType:
+    @staticmethod
+    def build(expr) -> SequenceType:
         pass
 
-    def get_declctx(self) -> Union[ast.Load, ast.Store]:
-        return getattr(
-            ast,
-            self.element.attrib.get("ctx", self.expr.meta.get("ctx", "load")).title(),
-            ast.Load,
-        )()
+    @staticmethod
+    def get_declctx(expr) -> Union[ast.Load, ast.Store]:
+        ctx = expr.expr.attrib.get("ctx")
+        if ctx is None:
+            ctx = expr.get_meta("ctx", "load")
+
+        return getattr(ast, ctx.title(), ast.Load)()
 
-    def get_declelts(self) -> Sequence[ast.AST]:
-        return [e.value for e in self.expr.children if isinstance(e.value, ast.AST)]
+    @staticmethod
+    def get_declelts(expr) -> Sequence[ast.AST]:
+        return [e.value for e in expr.children if isinstance(e.value, ast.AST)]
 
 
 @SemanticRule.register
@@ -141,8 +123,9 @@ class List(Sequence, Expr):
 
     _type = SemanticType("List", SemanticMod.SUB_ELM_ATTR)
 
-    def make(self) -> ast.List:
-        return ast.List(self.get_declelts(), self.get_declctx())
+    @staticmethod
+    def build(expr) -> ast.List:
+        return ast.List(Sequence.get_declelts(expr), Sequence.get_declctx(expr))
 
 
 @SemanticRule.register
@@ -151,8 +134,9 @@ class Tuple(Sequence, Expr):
 
     _type = SemanticType("Tuple", SemanticMod.SUB_ELM_ATTR)
 
-    def make(self) -> ast.Tuple:
-        return ast.Tuple(self.get_declelts(), self.get_declctx())
+    @staticmethod
+    def build(expr) -> ast.Tuple:
+        return ast.Tuple(Sequence.get_declelts(expr), Sequence.get_declctx(expr))
 
 
 @SemanticRule.register
@@ -161,30 +145,30 @@ class Set(Sequence, Expr):
 
     _type = SemanticType("Set", SemanticMod.SUB_ELM_ATTR)
 
-    def make(self) -> ast.Set:
-        return ast.Set(self.get_declelts())
+    @staticmethod
+    def build(expr) -> ast.Set:
+        return ast.Set(Sequence.get_declelts(expr))
 
 
 class Mapping(Expr):
     _type = SemanticType("NaRT", SemanticMod.SUB_ELM_ATTR)
 
-    def __init__(self, expr):
-        super().__init__(expr)
+    @staticmethod
+    def build(expr) -> MappingType:
+        pass
 
-        pairs = self.get_declpairs()
-        self.keys = list(map(operator.itemgetter(0), pairs))
-        self.values = list(map(operator.itemgetter(1), pairs))
+    @staticmethod
+    def get_declpairs(expr) -> Tuple:
+        keys = []
+        values = []
 
-    def make(self) -> MappingType:
-        pass
+        for e in expr.children:
+            key, value = e.value[0], e.value[1]
+            if isinstance(key, ast.Str) and isinstance(value, ast.AST):
+                keys.append(key)
+                values.append(value)
 
-    def get_declpairs(self) -> List:
-        pairs = [
-            e.value
-            for e in self.expr.children
-            if isinstance(e.value[0], ast.Str) and isinstance(e.value[1], ast.AST)
-        ]
-        return pairs
+        return keys, values
 
 
 @SemanticRule.register
@@ -193,8 +177,9 @@ class Dict(Mapping, Expr):
 
     _type = SemanticType("Dict", SemanticMod.SUB_ELM_ATTR)
 
-    def make(self) -> ast.Dict:
-        return ast.Dict(self.keys, self.values)
+    @staticmethod
+    def build(expr) -> ast.Dict:
+        return ast.Dict(*Mapping.get_declpairs(expr))
 
 
 @SemanticRule.register
@@ -203,9 +188,10 @@ class DictItem(Element, Expr):
 
     _type = SemanticType("DictItem", SemanticMod.TEXT_ATTR)
 
-    def make(self) -> Tuple:
-        key = ast.Str(self.element.attrib["name"])
-        value = super().make()
+    @staticmethod
+    def build(expr) -> Tuple:
+        key = ast.Str(expr.expr.attrib["name"])
+        value = Element.build(expr)
 
         return key, value
 
@@ -218,33 +204,32 @@ class Name(Element, Expr):
         "Name", SemanticModUnion[SemanticMod.TEXT_ATTR, SemanticMod.NO_TEXT_ATTR]
     )
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.attribs = []
-
-    def make(self) -> ast.Name:
-        text = self.element.text
-        call = strtobool(self.element.attrib.get("call", "False"))
+    @staticmethod
+    def build(expr) -> ast.Name:
+        element = expr.expr
+        text = element.text
+        call = strtobool(element.attrib.get("call", "False"))
 
         if isinstance(text, str):
             text = text.strip()
 
         if not text:
-            val = ast.Name(self.element.tag, ast.Load())
-            spec = self.get_declspec(self.expr, self.add_attr)
+            attribs = []
+            val = ast.Name(element.tag, ast.Load())
+            spec = Name.get_declspec(expr, attribs.append)
             c = 0
 
             if call:
                 val = ast.Call(val, *spec)
                 c = 1
 
-            if self.attribs:
-                for attr in self.attribs:
+            if attribs:
+                for attr in attribs:
                     t = attr[1].text.strip() if isinstance(attr[1].text, str) else None
                     if t:
                         val = ast.Assign(
                             [ast.Attribute(val, attr[2], ast.Store())],
-                            Element(attr[0]).make(),
+                            Element.build(attr[0]),
                         )
                     else:
                         val = ast.Attribute(val, attr[2], ast.Load())
@@ -254,27 +239,32 @@ class Name(Element, Expr):
                 c = 1
 
             if not c:
-                if len(self.element) == 1:
-                    return ast.Assign(
-                        [ast.Name(self.element.tag, ast.Store())],
-                        Name(self.expr.children[0]).make(),
-                    )
+                if len(element) == 1:
+                    child = expr.children[0]
+                    if get_handler(child.expr.tag) is Name.build:
+                        value = child.value
+                    else:
+                        value = Name.build(child)
+                    return ast.Assign([ast.Name(element.tag, ast.Store())], value)
 
             return val
 
         else:
-            target = ast.Name(self.element.tag, ast.Store())
-            return ast.Assign([target], super().make())
+            target = ast.Name(element.tag, ast.Store())
+            return ast.Assign([target], Element.build(expr))
 
     @staticmethod
     def get_declspec(expr, notifier) -> Tuple:
+        """Splits children of a name into call arguments. Values of
+        ``<attr>`` children are passed to notifier instead."""
+
         args = []
         kwargs = []
 
         for e in expr.children:
             v = e.value
             if e.expr.tag == "attr":
-                notifier(e)
+                notifier(v)
             else:
                 if isinstance(v, tuple):
                     kwargs.append(ast.keyword(v[0].s, v[1]))
@@ -283,43 +273,97 @@ class Name(Element, Expr):
 
         return args, kwargs
 
-    def add_attr(self, attr) -> None:
-        val = attr.value
-        self.attribs.append(val)
-
 
 @SemanticRule.register
 class Attribute(Element, Expr):
     _type = SemanticType("Attibute", SemanticMod.SUB_ELM_ATTR)
 
-    def make(self) -> Tuple:
+    @staticmethod
+    def build(expr) -> Tuple:
         """FYI it doesnt return a real ast.AST, it returns a tuple of python objects
-        that we are going to use in Name.add_attr"""
+        that we are going to use in Name.build"""
 
-        name = self.element.attrib["name"]
-        call = strtobool(self.element.attrib.get("call", "False"))
+        element = expr.expr
+        name = element.attrib["name"]
+        call = strtobool(element.attrib.get("call", "False"))
 
         if call:
-            spec = Name.get_declspec(self.expr, lambda e: None)
-            return self.expr, self.element, name, spec
+            spec = Name.get_declspec(expr, _ignore)
+            return expr, element, name, spec
         else:
-            return self.expr, self.element, name
+            return expr, element, name
+
+
+def _ignore(value) -> None:
+    pass
+
+
+class SemanticRegistry(dict):
+    """Tag to semantic rule mapping. Handlers resolved by
+    :py:func:`get_handler` are cached, any change to the registry
+    drops that cache."""
 
+    def _invalidating(method):
+        def wrapper(self, *args, **kwargs):
+            _handlers.clear()
+            return method(self, *args, **kwargs)
 
-SemanticMap = {
-    "e": Element,
-    "list": List,
-    "tuple": Tuple,
-    "set": Set,
-    "dict": Dict,
-    "item": DictItem,
-    "fstring": FString,
-    "attr": Attribute,
-}
+        wrapper.__name__ = method.__name__
+        return wrapper
+
+    __setitem__ = _invalidating(dict.__setitem__)
+    __delitem__ = _invalidating(dict.__delitem__)
+    clear = _invalidating(dict.clear)
+    pop = _invalidating(dict.pop)
+    popitem = _invalidating(dict.popitem)
+    setdefault = _invalidating(dict.setdefault)
+    update = _invalidating(dict.update)
+
+    del _invalidating
+
+
+# Rules whose value only depends on the tag, attributes and text of the
+# element and on the values of its children, so equal subtrees of them
+# build equal values. See the share argument of Parser.
+IMMUTABLE_LITERAL_RULES = frozenset({Element, Tuple})
+LITERAL_RULES = IMMUTABLE_LITERAL_RULES | {List, Set, Dict, DictItem}
+
+SemanticMap = SemanticRegistry(
+    {
+        "e": Element,
+        "list": List,
+        "tuple": Tuple,
+        "set": Set,
+        "dict": Dict,
+        "item": DictItem,
+        "fstring": FString,
+        "attr": Attribute,
+    }
+)
+
+_handlers = {}
 
 
 def get_decl(tag):
-    try:
-        return SemanticMap[tag]
-    except KeyError:
-        return Name
+    return SemanticMap.get(tag, Name)
+
+
+def get_handler(tag):
+    """Returns a function that builds the AST of a node with given tag.
+    Resolved once per tag, plain names fall back to :py:class:`Name`."""
+
+    handler = _handlers.get(tag)
+    if handler is None:
+        handler = _handlers[tag] = _resolve(get_decl(tag))
+
+    return handler
+
+
+def _resolve(rule):
+    if getattr(rule, "make", None) is Expr.make:
+        return rule.build
+
+    def handler(expr):
+        return rule(expr).make()
+
+    return handler
@@ -0,0 +1,109 @@
+"""Source input
+
+Feeds XMLLang sources to the parser backends in large chunks. Files are
+memory mapped and sliced with ``memoryview``, buffers (``bytes``,
+``bytearray``, ``memoryview``, ``mmap``) are sliced the same way and file
+objects are read into a single reused buffer, so no copy of the document
+is made on the Python side.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+from contextlib import contextmanager
+
+CHUNK_SIZE = 1 << 24
+READ_SIZE = 1 << 16
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import xml.etree.ElementTree as ET
+    from typing import IO, Iterator, Union
+
+    Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+    Source = Union[str, os.PathLike, Buffer, IO[bytes]]
+
+
+@contextmanager
+def mapped(path: os.PathLike) -> Iterator[Buffer]:
+    """Maps given file read-only. Files that can't be mapped (empty files,
+    pipes) are read instead."""
+
+    with open(os.fspath(path), "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            buffer = None
+
+        if buffer is None:
+            yield f.read()
+            return
+
+        with buffer:
+            if hasattr(buffer, "madvise"):
+                buffer.madvise(mmap.MADV_SEQUENTIAL)
+            yield buffer
+
+
+def slices(buffer: Buffer, size: int = CHUNK_SIZE) -> Iterator[memoryview]:
+    """Yields zero copy slices of buffer, each one is released as soon as
+    the next one is requested."""
+
+    view = memoryview(buffer)
+    if view.ndim != 1 or view.itemsize != 1:
+        view = view.cast("B")
+
+    with view:
+        for start in range(0, view.nbytes, size):
+            with view[start : start + size] as chunk:
+                yield chunk
+
+
+def reads(file: IO[bytes], size: int = READ_SIZE) -> Iterator[memoryview]:
+    """Yields the content of a file object, read into a reused buffer"""
+
+    readinto = getattr(file, "readinto", None)
+    if readinto is None:
+        yield from iter(lambda: file.read(size), file.read(0))
+        return
+
+    buffer = bytearray(size)
+    with memoryview(buffer) as view:
+        while True:
+            length = readinto(view)
+            if not length:
+                break
+
+            with view[:length] as chunk:
+                yield chunk
+
+
+@contextmanager
+def chunks(source: Source) -> Iterator[Iterator[Buffer]]:
+    """Yields the chunks of a path, a buffer or a file object"""
+
+    if hasattr(source, "read"):
+        yield reads(source)
+    elif isinstance(source, (str, os.PathLike)):
+        with mapped(source) as buffer:
+            data = slices(buffer)
+            try:
+                yield data
+            finally:
+                data.close()
+    else:
+        yield slices(source)
+
+
+def parse_etree(source: Source) -> ET.ElementTree:
+    """Parses source into an ``ET.ElementTree``"""
+
+    import xml.etree.ElementTree as ET
+
+    parser = ET.XMLParser()
+    with chunks(source) as data:
+        for chunk in data:
+            parser.feed(chunk)
+
+    return ET.ElementTree(parser.close())
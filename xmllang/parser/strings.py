@@ -0,0 +1,38 @@
+"""String interning
+
+Generated documents repeat the same identifiers and literals over and
+over. An :py:class:`InternTable` lives as long as a single parse: the
+expat front end puts tag and attribute names, attribute values and texts
+in it and the builder the strings of the AST nodes it creates, so equal
+strings of a document (and of its AST) are a single object. Streaming
+parses empty it after every statement, so its size stays bounded.
+"""
+
+from __future__ import annotations
+
+
+class InternTable:
+    """Per parse string table. ``len()`` is the number of distinct
+    strings interned, ``reused`` counts the copies that were dropped.
+
+    Interning is a single dict operation, so a table can be shared by
+    threads building from the same parse tree, ``reused`` may then miss
+    a few copies."""
+
+    __slots__ = ("strings", "reused")
+
+    def __init__(self) -> None:
+        self.strings = {}
+        self.reused = 0
+
+    def intern(self, string: str) -> str:
+        interned = self.strings.setdefault(string, string)
+        if interned is not string:
+            self.reused += 1
+        return interned
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def __repr__(self):
+        return f"InternTable(interned={len(self)}, reused={self.reused})"
@@ -0,0 +1,114 @@
+"""Phase profiler for the XMLLang pipeline
+
+A :py:class:`Profiler` passed to :py:class:`xmllang.parser.Parser` (as
+its ``tracer``) or to :py:class:`xmllang.compiler.Compiler` records the
+wall time of every phase (``fromfile``, ``_parse``, ``build_module``,
+``compile``, ``exec``) and call counts and cumulative time of each
+``xmleval`` per tag and per semantic rule, along with the number of
+strings the parser interned.
+"""
+
+import time
+
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from xmllang.parser.semantics import get_decl
+from xmllang.parser.strings import InternTable
+
+
+class Timing:
+    __slots__ = ("calls", "total")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total = 0.0
+
+    def add(self, elapsed: float) -> None:
+        self.calls += 1
+        self.total += elapsed
+
+    def __repr__(self):
+        return f"Timing(calls={self.calls}, total={self.total:.6f})"
+
+
+class Profiler:
+    def __init__(self) -> None:
+        self.phases = {}
+        self.tags = {}
+        self.strings = None
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._timing(self.phases, name).add(time.perf_counter() - start)
+
+    def count(self, tag: str, elapsed: float) -> None:
+        self._timing(self.tags, tag).add(elapsed)
+
+    def stats(self) -> "ProfileStats":
+        return ProfileStats(self.phases, self.tags, self.strings)
+
+    @staticmethod
+    def _timing(timings: Dict[str, Timing], name: str) -> Timing:
+        timing = timings.get(name)
+        if timing is None:
+            timing = timings[name] = Timing()
+        return timing
+
+
+class ProfileStats:
+    """Result of a profiled run. Nested phases are included in their
+    parent's time."""
+
+    def __init__(
+        self,
+        phases: Dict[str, Timing],
+        tags: Dict[str, Timing],
+        strings: Optional[InternTable] = None,
+    ) -> None:
+        self.phases = phases
+        self.tags = tags
+        self.strings = strings
+
+    @property
+    def rules(self) -> Dict[str, Timing]:
+        rules = {}
+        for tag, timing in self.tags.items():
+            rule = Profiler._timing(rules, get_decl(tag).__name__)
+            rule.calls += timing.calls
+            rule.total += timing.total
+        return rules
+
+    def format(self, limit: int = 20) -> str:
+        lines = [f"{'phase':24} {'calls':>10} {'total':>12}"]
+        for name, timing in self.phases.items():
+            lines.append(f"{name:24} {timing.calls:10} {timing.total:11.4f}s")
+
+        if self.strings is not None:
+            lines.append("")
+            lines.append(f"{'strings':24} {'interned':>10} {'reused':>12}")
+            lines.append(f"{'':24} {len(self.strings):10} {self.strings.reused:12}")
+
+        for title, timings in (("rule", self.rules), ("tag", self.tags)):
+            lines.append("")
+            lines.append(
+                f"{title:24} {'calls':>10} {'cumulative':>12} {'per call':>12}"
+            )
+            for name, timing in self._sorted(timings)[:limit]:
+                lines.append(
+                    f"{name:24} {timing.calls:10} {timing.total:11.4f}s "
+                    f"{timing.total / timing.calls * 1e6:10.2f}us"
+                )
+
+        return "\n".join(lines)
+
+    @staticmethod
+    def _sorted(timings: Dict[str, Timing]) -> List:
+        return sorted(timings.items(), key=lambda item: -item[1].total)
+
+    def __str__(self):
+        return self.format()